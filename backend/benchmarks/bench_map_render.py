@@ -0,0 +1,86 @@
+"""
+Benchmark for ClusteringService.render_map
+Compares the Pillow palette renderer with the previous matplotlib imshow/savefig path
+(needs matplotlib installed: pip install matplotlib)
+
+Run from the backend directory:
+    python benchmarks/bench_map_render.py
+"""
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.clustering_service import ClusteringService
+
+
+def legacy_render(service: ClusteringService, classification_map: np.ndarray) -> tuple:
+    """Map rendering as it was before the Pillow renderer"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+
+    plt.figure(figsize=(6, 6))
+    plt.axis('off')
+    plt.imshow(
+        np.ma.masked_equal(classification_map, service.NODATA),
+        cmap=ListedColormap(service.colors_6class),
+        vmin=1,
+        vmax=6
+    )
+    plt.grid(False)
+
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0, dpi=100)
+    plt.close()
+
+    return buf.getvalue(), 'image/png'
+
+
+def make_map(size: int, seed: int = 0) -> np.ndarray:
+    """Blocky 6-class map with a no-data border"""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(1, 7, size=(size // 5 + 1, size // 5 + 1), dtype=np.uint8)
+    classification_map = np.kron(blocks, np.ones((5, 5), dtype=np.uint8))[:size, :size]
+    classification_map[:size // 10, :] = ClusteringService.NODATA
+    return classification_map
+
+
+def time_call(render, classification_map: np.ndarray, repeats: int = 5) -> tuple:
+    render(classification_map)  # warm up
+    started = time.perf_counter()
+    for _ in range(repeats):
+        image_bytes, _ = render(classification_map)
+    return (time.perf_counter() - started) / repeats, len(image_bytes)
+
+
+def main():
+    png_service = ClusteringService(map_format='png')
+    webp_service = ClusteringService(map_format='webp')
+
+    print(f"{'size':>9} {'matplotlib':>18} {'pillow png':>18} {'pillow webp':>18}")
+    for size in [50, 150, 500, 1000]:
+        classification_map = make_map(size)
+
+        columns = []
+        try:
+            columns.append(time_call(lambda m: legacy_render(png_service, m), classification_map))
+        except ImportError:
+            columns.append(None)
+        columns.append(time_call(png_service.render_map, classification_map))
+        columns.append(time_call(webp_service.render_map, classification_map))
+
+        cells = [
+            f"{'n/a':>18}" if column is None else f"{column[0] * 1000:>7.1f} ms {column[1] / 1024:>5.0f} KB"
+            for column in columns
+        ]
+        print(f"{size:>4}x{size:<4} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
 import os
+import json
+import asyncio
 from dotenv import load_dotenv
 
 from services.ndvi_service import NDVIService
-from services.clustering_service import ClusteringService
+from services.ndvi_cache import NDVIRasterCache
+from services.clustering_service import ClusteringService, ClusteringQueueFullError
 from services.gemini_service import GeminiCropRecommendation
 from services.mongodb_service import MongoDBService
+from services.job_service import JobService, JobQueueFullError
+from services.analysis_cache import AnalysisResultCache
+from services.map_store import MapStore
 
 load_dotenv()
 
@@ -38,6 +46,8 @@ class AnalysisRequest(BaseModel):
     location: str
     district: str
     state: str
+    # Reuse the exemplars of this field's last stored analysis instead of re-clustering
+    incremental: bool = False
 
 class ClassificationResult(BaseModel):
     class_1: float  # Percentage for each class
@@ -63,26 +73,108 @@ class AnalysisResponse(BaseModel):
     crop_recommendations: List[CropRecommendation]
     profitability_score: int
     analysis_date: str
+    # Incremental analyses only: years taken from the NDVI raster cache instead of re-downloaded
+    incremental_reused_years: Optional[List[int]] = None
+
+class BatchAnalysisRequest(BaseModel):
+    fields: List[AnalysisRequest]
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed
+    stage: str  # queued, ndvi, clustering, recommendations, persist, done
+    last_event: Optional[str] = None
+    field_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[AnalysisResponse] = None
+
+batch_max_fields = int(os.getenv("BATCH_MAX_FIELDS", "100"))
+batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "2"))
+
+# Services are created by the startup hook, not on import: the spawn-started clustering
+# workers re-import this module (as __mp_main__ under `python main.py`) and must not
+# initialize Earth Engine, connect to MongoDB or build the services again
+ndvi_cache: Optional[NDVIRasterCache] = None
+ndvi_service: Optional[NDVIService] = None
+clustering_service: Optional[ClusteringService] = None
+gemini_service: Optional[GeminiCropRecommendation] = None
+analysis_cache: Optional[AnalysisResultCache] = None
+job_service: Optional[JobService] = None
+mongodb_service: Optional[MongoDBService] = None
+map_store: Optional[MapStore] = None
+
+
+def create_services():
+    """Initialize services from the environment"""
+    global ndvi_cache, ndvi_service, clustering_service, gemini_service
+    global analysis_cache, job_service, mongodb_service, map_store
+
+    project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
+    mongodb_uri = os.getenv("MONGODB_URI")
+    print(f"MongoDB URI loaded: {'Yes' if mongodb_uri else 'No'}")
+    ndvi_cache_max_mb = int(os.getenv("NDVI_CACHE_MAX_MB", "512"))
+    ndvi_cache = NDVIRasterCache(
+        cache_dir=os.getenv("NDVI_CACHE_DIR", "ndvi_cache"),
+        max_bytes=ndvi_cache_max_mb * 1024 * 1024
+    ) if ndvi_cache_max_mb > 0 else None
+    ndvi_service = NDVIService(
+        project_id=project_id,
+        max_concurrent_years=int(os.getenv("EE_MAX_CONCURRENT_YEARS", "5")),
+        scene_selection=os.getenv("EE_SCENE_SELECTION", "window"),
+        fetch_mode=os.getenv("EE_FETCH_MODE", "stacked"),
+        cache=ndvi_cache
+    )
+    clustering_service = ClusteringService(
+        max_workers=int(os.getenv("CLUSTERING_WORKERS", "2")),
+        max_queue_size=int(os.getenv("CLUSTERING_QUEUE_SIZE", "10")),
+        clustering_backend=os.getenv("CLUSTERING_BACKEND", "auto"),
+        max_memory_mb=int(os.getenv("CLUSTERING_MAX_MEMORY_MB", "1024")),
+        dedup_precision=float(os.getenv("CLUSTERING_DEDUP_PRECISION", "0")),
+        map_format=os.getenv("MAP_IMAGE_FORMAT", "png"),
+        map_size=int(os.getenv("MAP_IMAGE_SIZE", "600"))
+    )
+    gemini_service = GeminiCropRecommendation(api_key=os.getenv("GEMINI_API_KEY"))
+    analysis_cache = AnalysisResultCache(
+        ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", "600"))
+    )
+    job_service = JobService(
+        num_workers=int(os.getenv("ANALYSIS_WORKERS", "2")),
+        max_queue_size=int(os.getenv("ANALYSIS_QUEUE_SIZE", "20"))
+    )
+
+    # Initialize MongoDB service
+    if mongodb_uri:
+        try:
+            mongodb_service = MongoDBService(mongodb_uri=mongodb_uri)
+            print("✅ MongoDB service initialized successfully")
+        except Exception as e:
+            print(f"❌ Failed to initialize MongoDB service: {str(e)}")
+            mongodb_service = None
+    else:
+        mongodb_service = None
+        print("⚠️ MongoDB URI not found in environment variables")
 
-# Initialize services
-project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
-mongodb_uri = os.getenv("MONGODB_URI")
-print(f"MongoDB URI loaded: {'Yes' if mongodb_uri else 'No'}")
-ndvi_service = NDVIService(project_id=project_id)
-clustering_service = ClusteringService()
-gemini_service = GeminiCropRecommendation(api_key=os.getenv("GEMINI_API_KEY"))
+    map_store = MapStore(mongodb_service=mongodb_service)
 
-# Initialize MongoDB service
-if mongodb_uri:
-    try:
-        mongodb_service = MongoDBService(mongodb_uri=mongodb_uri)
-        print("✅ MongoDB service initialized successfully")
-    except Exception as e:
-        print(f"❌ Failed to initialize MongoDB service: {str(e)}")
-        mongodb_service = None
-else:
-    mongodb_service = None
-    print("⚠️ MongoDB URI not found in environment variables")
+
+@app.on_event("startup")
+async def start_background_workers():
+    create_services()
+    job_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await job_service.stop()
+    clustering_service.shutdown()
 
 
 @app.get("/")
@@ -94,95 +186,347 @@ async def root():
     }
 
 
-@app.post("/api/analyze-field", response_model=AnalysisResponse)
-async def analyze_field(request: AnalysisRequest):
+def analysis_fingerprint(request: AnalysisRequest) -> str:
+    """Hash of every request value that affects the analysis result"""
+    return AnalysisResultCache.fingerprint({
+        "field_id": request.field_id,
+        "coordinates": NDVIRasterCache.normalize_polygon(request.coordinates.coordinates[0]),
+        "soil_type": request.soil_type,
+        "water_source": request.water_source,
+        "crop_type": request.crop_type,
+        "location": request.location,
+        "district": request.district,
+        "state": request.state,
+        "incremental": request.incremental
+    })
+
+
+async def run_analysis_pipeline(
+    request: AnalysisRequest,
+    progress: Optional[Callable[..., None]] = None
+) -> AnalysisResponse:
+    """
+    Run the analysis, reusing a recent identical result or joining an identical
+    analysis that is already running (ANALYSIS_CACHE_TTL controls reuse)
+    progress receives the events of the shared run, including ones emitted before joining
     """
-    Main endpoint for field analysis:
+    return await analysis_cache.get_or_compute(
+        analysis_fingerprint(request),
+        lambda shared_progress: compute_analysis(request, shared_progress),
+        progress
+    )
+
+
+async def compute_analysis(
+    request: AnalysisRequest,
+    progress: Optional[Callable[..., None]] = None,
+    ndvi_data: Optional[Dict[str, Any]] = None
+) -> AnalysisResponse:
+    """
+    Run the full field analysis pipeline:
     1. Fetch 5 years of NDVI satellite imagery
     2. Perform Affinity Propagation clustering
     3. Generate 6-class classification map
     4. Get AI crop recommendations from Gemini
+    5. Save the analysis to MongoDB
+
+    progress(event, data=None) is called as each stage starts ("ndvi", "clustering",
+    "recommendations", "persist") and as partial results become available
+    ("scene_selected", "ndvi_ready", "clustering_done", "map_ready", "recommendations_ready")
+
+    ndvi_data can be passed in when the imagery was already fetched (batch analysis)
     """
-    try:
-        # Step 1: Extract coordinates from GeoJSON
-        polygon_coords = request.coordinates.coordinates[0]
+    if progress is None:
+        progress = lambda event, data=None: None
+
+    # Step 1: Extract coordinates from GeoJSON
+    polygon_coords = request.coordinates.coordinates[0]
 
-        # Step 2: Fetch NDVI imagery for 5 years
+    # Step 2: Fetch NDVI imagery for 5 years
+    if ndvi_data is None:
+        progress("ndvi")
         print(f"Fetching NDVI data for field: {request.field_name}")
         ndvi_data = await ndvi_service.fetch_ndvi_imagery(
             polygon_coords=polygon_coords,
-            years=5
+            years=5,
+            progress=progress
         )
-
-        # Step 3: Perform Affinity Propagation clustering
-        print("Performing Affinity Propagation clustering...")
-        clustering_result = await clustering_service.perform_clustering(
-            ndvi_arrays=ndvi_data['ndvi_arrays'],
-            metadata=ndvi_data['metadata']
-        )
-
-        # Step 4: Get crop recommendations from Gemini AI
-        print("Generating AI crop recommendations...")
-        recommendations = await gemini_service.get_recommendations(
-            field_data={
-                "name": request.field_name,
-                "location": f"{request.district}, {request.state}",
-                "soil_type": request.soil_type,
-                "water_source": request.water_source,
-                "current_crop": request.crop_type,
-                "ndvi_stats": ndvi_data['statistics'],
-                "classification": clustering_result['classification_percentages']
+    progress("ndvi_ready", {"ndvi_stats": ndvi_data['statistics']})
+
+    incremental_reused_years = None
+    if request.incremental:
+        incremental_reused_years = ndvi_data.get('cached_years', [])
+        if len(incremental_reused_years) < len(ndvi_data['ndvi_arrays']):
+            # Reuse depends on the raster cache (NDVI_CACHE_MAX_MB=0 or eviction means re-downloading)
+            print(
+                f"⚠️ Incremental analysis reused {len(incremental_reused_years)} of "
+                f"{len(ndvi_data['ndvi_arrays'])} years from the NDVI cache: {incremental_reused_years}"
+            )
+
+    # Step 3: Perform Affinity Propagation clustering
+    progress("clustering")
+    print("Performing Affinity Propagation clustering...")
+    warm_start = None
+    if request.incremental and mongodb_service:
+        previous = mongodb_service.get_recent_analysis(request.field_id)
+        if previous and previous.get("exemplar_indices"):
+            warm_start = {
+                "exemplar_indices": previous["exemplar_indices"],
+                "raster_shape": previous.get("raster_shape")
             }
-        )
+    clustering_result = await clustering_service.perform_clustering(
+        ndvi_arrays=ndvi_data['ndvi_arrays'],
+        metadata=ndvi_data['metadata'],
+        warm_start=warm_start
+    )
+    progress("clustering_done", {
+        "warm_start": clustering_result['warm_start'],
+        "num_clusters": clustering_result['num_clusters'],
+        "threshold": clustering_result['threshold'],
+        "classification": clustering_result['classification_percentages'],
+        "profitability_score": clustering_result['profitability_score']
+    })
+
+    # Store the rendered map once; responses only carry its URL
+    map_id = map_store.put(request.field_id, clustering_result['map_image'], clustering_result['map_mime_type'])
+    map_url = MapStore.url(request.field_id, map_id, clustering_result['map_mime_type'])
+    progress("map_ready", {"classification_map_url": map_url})
+
+    # Step 4: Get crop recommendations from Gemini AI
+    progress("recommendations")
+    print("Generating AI crop recommendations...")
+    recommendations = await gemini_service.get_recommendations(
+        field_data={
+            "name": request.field_name,
+            "location": f"{request.district}, {request.state}",
+            "soil_type": request.soil_type,
+            "water_source": request.water_source,
+            "current_crop": request.crop_type,
+            "ndvi_stats": ndvi_data['statistics'],
+            "classification": clustering_result['classification_percentages']
+        }
+    )
+    progress("recommendations_ready", {"crop_recommendations": recommendations})
+
+    # Step 5: Build response
+    response = AnalysisResponse(
+        field_id=request.field_id,
+        classification=ClassificationResult(**clustering_result['classification_percentages']),
+        classification_map_url=map_url,
+        ndvi_stats=ndvi_data['statistics'],
+        crop_recommendations=recommendations,
+        profitability_score=clustering_result['profitability_score'],
+        analysis_date=ndvi_data['analysis_date'],
+        incremental_reused_years=incremental_reused_years
+    )
+
+    # Step 6: Save to MongoDB
+    progress("persist")
+    print(f"\n{'='*70}")
+    print(f"MongoDB Service Status: {'Available' if mongodb_service else 'Not Available'}")
+    if mongodb_service:
+        print(f"Attempting to save analysis for field: {request.field_id}")
+        try:
+            dropped_map_ids = mongodb_service.save_analysis(
+                field_id=request.field_id,
+                analysis_data={
+                    "classification": clustering_result['classification_percentages'],
+                    "classification_map_url": map_url,
+                    "map_id": map_id,
+                    "exemplar_indices": clustering_result['exemplar_indices'],
+                    "raster_shape": clustering_result['raster_shape'],
+                    "ndvi_stats": ndvi_data['statistics'],
+                    "crop_recommendations": recommendations,
+                    "profitability_score": clustering_result['profitability_score'],
+                    "analysis_date": ndvi_data['analysis_date']
+                }
+            )
+            if dropped_map_ids is not None:
+                print(f"✅ Analysis saved to MongoDB for field: {request.field_id}")
+                map_store.discard(request.field_id, dropped_map_ids)
+            else:
+                print(f"⚠️ MongoDB save_analysis failed for field: {request.field_id}")
+        except Exception as mongo_error:
+            print(f"❌ Failed to save to MongoDB: {str(mongo_error)}")
+            import traceback
+            traceback.print_exc()
+            # Don't fail the request if MongoDB save fails
+    else:
+        print("⚠️ Skipping MongoDB save - service not initialized")
+    print(f"{'='*70}\n")
+
+    return response
 
-        # Step 5: Build response
-        response = AnalysisResponse(
-            field_id=request.field_id,
-            classification=ClassificationResult(**clustering_result['classification_percentages']),
-            classification_map_url=clustering_result['map_base64'],
-            ndvi_stats=ndvi_data['statistics'],
-            crop_recommendations=recommendations,
-            profitability_score=clustering_result['profitability_score'],
-            analysis_date=ndvi_data['analysis_date']
-        )
 
-        # Step 6: Save to MongoDB
-        print(f"\n{'='*70}")
-        print(f"MongoDB Service Status: {'Available' if mongodb_service else 'Not Available'}")
-        if mongodb_service:
-            print(f"Attempting to save analysis for field: {request.field_id}")
-            try:
-                result = mongodb_service.save_analysis(
-                    field_id=request.field_id,
-                    analysis_data={
-                        "classification": clustering_result['classification_percentages'],
-                        "classification_map_url": clustering_result['map_base64'],
-                        "ndvi_stats": ndvi_data['statistics'],
-                        "crop_recommendations": recommendations,
-                        "profitability_score": clustering_result['profitability_score'],
-                        "analysis_date": ndvi_data['analysis_date']
-                    }
-                )
-                if result:
-                    print(f"✅ Analysis saved to MongoDB for field: {request.field_id}")
-                else:
-                    print(f"⚠️ MongoDB save_analysis returned False for field: {request.field_id}")
-            except Exception as mongo_error:
-                print(f"❌ Failed to save to MongoDB: {str(mongo_error)}")
-                import traceback
-                traceback.print_exc()
-                # Don't fail the request if MongoDB save fails
-        else:
-            print("⚠️ Skipping MongoDB save - service not initialized")
-        print(f"{'='*70}\n")
-
-        return response
+@app.post("/api/analyze-field", response_model=AnalysisResponse)
+async def analyze_field(request: AnalysisRequest):
+    """
+    Main endpoint for field analysis
+    Holds the connection until the whole pipeline has finished
+    """
+    try:
+        return await run_analysis_pipeline(request)
 
+    except ClusteringQueueFullError as e:
+        print(f"Clustering busy in analyze_field: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Analysis failed: {str(e)}")
     except Exception as e:
         print(f"Error in analyze_field: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.post("/api/analyze-fields/batch")
+async def analyze_fields_batch(batch: BatchAnalysisRequest):
+    """
+    Analyze many fields in one request and stream results back as NDJSON
+    Neighbouring fields share one Landsat scene search per year; clustering and
+    recommendations run with bounded concurrency (BATCH_CONCURRENCY)
+    Each line is {"field_id", "status": "completed"|"failed", "result"|"error"}, in completion order
+    """
+    if not batch.fields:
+        raise HTTPException(status_code=400, detail="No fields to analyze")
+    if len(batch.fields) > batch_max_fields:
+        raise HTTPException(status_code=400, detail=f"Too many fields in one batch (max {batch_max_fields})")
+
+    groups = ndvi_service.group_neighbouring_fields(
+        [field.coordinates.coordinates[0] for field in batch.fields]
+    )
+    print(f"Batch analysis: {len(batch.fields)} fields in {len(groups)} imagery groups")
+
+    lines: asyncio.Queue = asyncio.Queue()
+    field_slots = asyncio.Semaphore(batch_concurrency)
+
+    async def analyze_with_imagery(request: AnalysisRequest, ndvi_data: Any):
+        async with field_slots:
+            try:
+                if isinstance(ndvi_data, Exception):
+                    raise ndvi_data
+                response = await analysis_cache.get_or_compute(
+                    analysis_fingerprint(request),
+                    lambda progress: compute_analysis(request, progress, ndvi_data=ndvi_data)
+                )
+                line = {"field_id": request.field_id, "status": "completed", "result": response.model_dump()}
+            except Exception as e:
+                print(f"Error in batch analysis for field {request.field_id}: {str(e)}")
+                line = {"field_id": request.field_id, "status": "failed", "error": f"Analysis failed: {str(e)}"}
+        lines.put_nowait(line)
+
+    async def run_group(indexes: List[int]):
+        group_fields = [batch.fields[index] for index in indexes]
+        try:
+            imagery = await ndvi_service.fetch_ndvi_imagery_for_fields(
+                [field.coordinates.coordinates[0] for field in group_fields],
+                years=5
+            )
+        except Exception as e:
+            imagery = [e] * len(group_fields)
+
+        await asyncio.gather(*[
+            analyze_with_imagery(field, ndvi_data)
+            for field, ndvi_data in zip(group_fields, imagery)
+        ])
+
+    async def ndjson_stream():
+        tasks = [asyncio.create_task(run_group(indexes)) for indexes in groups]
+        try:
+            for _ in range(len(batch.fields)):
+                line = await lines.get()
+                yield json.dumps(line, default=str) + "\n"
+            await asyncio.gather(*tasks)
+        finally:
+            # Client disconnected before every field finished: stop the remaining work
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/analyze-field/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_analysis_job(request: AnalysisRequest):
+    """
+    Queue a field analysis and return a job id right away
+    Poll GET /api/jobs/{job_id} for the stage and final result
+    """
+    try:
+        job_id = job_service.submit(
+            handler=lambda progress: run_analysis_pipeline(request, progress),
+            metadata={"field_id": request.field_id, "field_name": request.field_name}
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return JobSubmitResponse(job_id=job_id, status="queued", status_url=f"/api/jobs/{job_id}")
+
+
+@app.post("/api/analyze-field/stream")
+async def analyze_field_stream(request: AnalysisRequest):
+    """
+    Run the analysis and stream progress as server-sent events
+    Emits scene_selected (per year), ndvi_ready, clustering_done, map_ready,
+    recommendations_ready and finally result (the AnalysisResponse) or error
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    def progress(event: str, data: Optional[Dict[str, Any]] = None):
+        events.put_nowait((event, data or {}))
+
+    async def run():
+        try:
+            response = await run_analysis_pipeline(request, progress)
+            events.put_nowait(("result", response.model_dump()))
+        except Exception as e:
+            print(f"Error in analyze_field_stream: {str(e)}")
+            events.put_nowait(("error", {"detail": f"Analysis failed: {str(e)}"}))
+        finally:
+            events.put_nowait(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run())
+        while True:
+            try:
+                item = await asyncio.wait_for(events.get(), timeout=15)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            event, data = item
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        await task
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """
+    Get the status of a queued analysis job
+    stage is one of: queued, ndvi, clustering, recommendations, persist, done
+    """
+    job = job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JobStatusResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        stage=job["stage"],
+        last_event=job["last_event"],
+        field_id=job["metadata"].get("field_id"),
+        error=job["error"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        result=job["result"]
+    )
+
+
 @app.get("/api/recent-analysis/{field_id}")
 async def get_recent_analysis(field_id: str):
     """
@@ -197,7 +541,11 @@ async def get_recent_analysis(field_id: str):
         if not analysis:
             raise HTTPException(status_code=404, detail="No analysis found for this field")
 
-        return analysis
+        # Warm-start data is only needed by the server
+        return {
+            key: value for key, value in analysis.items()
+            if key not in ("exemplar_indices", "raster_shape")
+        }
 
     except HTTPException:
         raise
@@ -206,6 +554,32 @@ async def get_recent_analysis(field_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to fetch analysis: {str(e)}")
 
 
+@app.get("/api/fields/{field_id}/maps/{map_id}.{extension}")
+async def get_classification_map(
+    field_id: str,
+    map_id: str,
+    extension: str,
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Serve a classification map image
+    Map ids are content hashes, so the image behind a URL never changes and can be cached forever
+    """
+    stored_map = map_store.get(field_id, map_id)
+    if not stored_map or MapStore.EXTENSIONS.get(stored_map["mime_type"]) != extension:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    etag = f'"{map_id}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+
+    if if_none_match:
+        client_etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in client_etags or "*" in client_etags:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=stored_map["image"], media_type=stored_map["mime_type"], headers=headers)
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -216,10 +590,18 @@ async def health_check():
             "clustering": "operational",
             "gemini_ai": "operational",
             "mongodb": "operational" if mongodb_service else "unavailable"
-        }
+        },
+        "ndvi_cache": ndvi_cache.stats() if ndvi_cache else None,
+        "analysis_cache": analysis_cache.stats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this server process"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class AnalysisResultCache:
+    """
+    In-memory memoization of finished analyses with single-flight deduplication
+    Identical requests within the TTL get the stored result, and identical requests
+    that arrive while an analysis is still running wait for that same computation
+    Progress events of a running computation reach every caller waiting on it
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 256):
+        """
+        Args:
+            ttl_seconds: How long a finished result is reused (0 only deduplicates in-flight work)
+            max_entries: Number of finished results kept in memory
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # Per in-flight key: events published so far and the progress callbacks of waiting callers
+        self._progress: Dict[str, Dict[str, List]] = {}
+
+    @staticmethod
+    def fingerprint(values: Dict[str, Any]) -> str:
+        """Stable hash of the request values that determine the analysis result"""
+        key_data = json.dumps(values, sort_keys=True, default=str)
+        return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[Callable[..., None]], Awaitable[Any]],
+        progress: Optional[Callable[..., None]] = None
+    ) -> Any:
+        """
+        Return the cached result for key, join the running computation, or start a new one
+        compute(progress) is only called for a new computation; every progress(event, data)
+        it reports is passed on to the progress callback of each waiting caller, and callers
+        that join late first get the events they missed
+        """
+        entry = self._results.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._results.move_to_end(key)
+                self.hits += 1
+                print(f"[Analysis Cache] Reusing result {key[:12]}")
+                return result
+            del self._results[key]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.shared += 1
+            print(f"[Analysis Cache] Joining in-flight analysis {key[:12]}")
+            return await self._wait(key, in_flight, progress)
+
+        self.misses += 1
+        self._progress[key] = {'events': [], 'subscribers': []}
+        task = asyncio.ensure_future(compute(lambda event, data=None: self._publish(key, event, data)))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda finished: self._finish(key, finished))
+
+        return await self._wait(key, task, progress)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared_in_flight': self.shared,
+            'entries': len(self._results),
+            'in_flight': len(self._in_flight),
+            'ttl_seconds': self.ttl_seconds
+        }
+
+    async def _wait(self, key: str, task: asyncio.Future, progress: Optional[Callable[..., None]]) -> Any:
+        """Wait for a computation, receiving its progress events (past ones replayed) meanwhile"""
+        listeners = self._progress.get(key)
+        if progress is None or listeners is None:
+            # Shielded so one caller going away does not cancel the work for the others
+            return await asyncio.shield(task)
+
+        for event, data in listeners['events']:
+            progress(event, data)
+        listeners['subscribers'].append(progress)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            listeners['subscribers'].remove(progress)
+
+    def _publish(self, key: str, event: str, data: Optional[Dict[str, Any]] = None):
+        """Record a progress event of a running computation and pass it to every waiting caller"""
+        listeners = self._progress.get(key)
+        if listeners is None:
+            return
+        listeners['events'].append((event, data))
+        for subscriber in list(listeners['subscribers']):
+            subscriber(event, data)
+
+    def _finish(self, key: str, task: asyncio.Future):
+        """Store a successful result; failures are not cached"""
+        self._in_flight.pop(key, None)
+        self._progress.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self.ttl_seconds <= 0:
+            return
+
+        self._results[key] = (time.monotonic() + self.ttl_seconds, task.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
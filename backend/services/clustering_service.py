@@ -1,14 +1,19 @@
 import numpy as np
 from sklearn.cluster import AffinityPropagation
 from sklearn.preprocessing import StandardScaler
-from typing import List, Dict, Any
-import base64
+from typing import List, Dict, Any, Optional, Callable, Iterator
+import asyncio
 import io
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-from matplotlib.colors import ListedColormap
+from services.metrics import PIPELINE_STAGE_SECONDS, ANALYSIS_PIXELS, ANALYSIS_CLUSTERS
+
+
+class ClusteringQueueFullError(Exception):
+    """Raised when every clustering worker is busy and the wait queue is full"""
 
 
 class ClusteringService:
@@ -17,31 +22,128 @@ class ClusteringService:
     Based on clustering.py logic
     """
 
-    def __init__(self):
-        """Initialize clustering parameters"""
+    # Classification map value for pixels without a class (classes are 1-6)
+    NODATA = 0
+
+    # exact: Affinity Propagation on every pixel
+    # sampled: Affinity Propagation on a stratified sample, then nearest-exemplar assignment
+    # auto: exact while the AP matrices fit in max_memory_mb, sampled above that
+    CLUSTERING_BACKENDS = ('auto', 'exact', 'sampled')
+
+    MAP_FORMATS = ('png', 'webp')
+
+    # AP keeps about this many N x N float64 matrices alive (similarity,
+    # responsibility, availability and temporaries)
+    AP_MATRICES = 5
+
+    def __init__(
+        self,
+        max_workers: int = 0,
+        max_queue_size: int = 10,
+        clustering_backend: str = 'auto',
+        max_memory_mb: int = 1024,
+        dedup_precision: float = 0,
+        map_format: str = 'png',
+        map_size: int = 600
+    ):
+        """
+        Initialize clustering parameters
+
+        Args:
+            max_workers: Number of worker processes for the CPU-bound clustering stages
+                         (0 runs clustering inline on the calling thread)
+            max_queue_size: Number of clustering runs allowed to wait for a free worker
+            clustering_backend: One of CLUSTERING_BACKENDS
+            max_memory_mb: Memory ceiling for one Affinity Propagation run; also sets
+                           the sample size of the sampled backend
+            dedup_precision: NDVI step pixel vectors are rounded to before identical
+                             vectors are clustered once (0 disables deduplication)
+            map_format: Classification map image format, one of MAP_FORMATS
+            map_size: Longest side of the map image in pixels; the raster is upscaled by
+                      the largest whole factor that fits (never downscaled)
+        """
+        if clustering_backend not in self.CLUSTERING_BACKENDS:
+            raise ValueError(f"clustering_backend must be one of {self.CLUSTERING_BACKENDS}, got '{clustering_backend}'")
+        self.clustering_backend = clustering_backend
+        self.max_memory_mb = max_memory_mb
+        self.max_exact_pixels = int(np.sqrt(max_memory_mb * 1024 * 1024 / (self.AP_MATRICES * 8)))
+        self.dedup_precision = dedup_precision
+
         # 6-class color map (from clustering.py)
         self.colors_6class = ['#C1292E', '#FCAA67', '#92977E', '#E6E18F', '#16C172', '#89FC00']
-        self.colormap_6class = ListedColormap(self.colors_6class)
-
-    def stack_and_preprocess(self, ndvi_arrays: List[np.ndarray]) -> np.ndarray:
+        # Palette index 0 is NODATA (transparent), 1-6 are the classes
+        self.map_palette = [0, 0, 0] + [
+            int(color[i:i + 2], 16) for color in self.colors_6class for i in (1, 3, 5)
+        ]
+
+        if map_format not in self.MAP_FORMATS:
+            raise ValueError(f"map_format must be one of {self.MAP_FORMATS}, got '{map_format}'")
+        self.map_format = map_format
+        self.map_size = map_size
+
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor = None
+        self._slots = None
+
+        if max_workers > 0:
+            # spawn starts workers without forking the server's Earth Engine / MongoDB client threads
+            # A spawned worker re-imports the script it was started from (main.py under
+            # `python main.py`), so that script must not create services at import time
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=({
+                    'clustering_backend': clustering_backend,
+                    'max_memory_mb': max_memory_mb,
+                    'dedup_precision': dedup_precision,
+                    'map_format': map_format,
+                    'map_size': map_size
+                },)
+            )
+            print(f"[Clustering] Process pool with {max_workers} workers (queue size: {max_queue_size})")
+
+    def stack_and_preprocess(self, ndvi_arrays: List[np.ndarray]) -> tuple:
         """
         Stack NDVI images from multiple years and prepare for clustering
-        Returns: pixels_with_no_none (N x 5 array where N is number of valid pixels)
+        Returns: (pixels_with_no_none, shape, outlier_positions, valid_pixel_indices)
+        pixels_with_no_none is N x 5 (N valid pixels) and valid_pixel_indices holds
+        the flat raster index of each of those rows
+
+        The years are never stacked in full: every pass reads the (possibly memory-mapped)
+        arrays in pixel chunks, and the outputs are file-backed when they exceed max_memory_mb
         """
-        # Stack images (5 years)
-        stacked_image = np.stack(ndvi_arrays)  # Shape: (5, height, width)
+        shape = ndvi_arrays[0].shape
+        if any(array.shape != shape for array in ndvi_arrays):
+            raise ValueError("NDVI arrays of every year must have the same shape")
+        num_years = len(ndvi_arrays)
+
+        # Flat views of each year; chunks are cast to float32, which is more than NDVI's precision needs
+        years = [np.asarray(array).reshape(-1) for array in ndvi_arrays]
+        num_pixels = years[0].size
+        bytes_per_pixel = 16 * num_years
+
+        def chunks():
+            return self._row_chunks(num_pixels, bytes_per_pixel)
+
+        def pixel_block(rows: slice) -> np.ndarray:
+            # One row of 5-year values per pixel, in raster order
+            return np.stack([year[rows] for year in years], axis=1).astype(np.float32, copy=False)
 
         # Get background/invalid pixels (minimum values)
-        min_val = np.min(stacked_image[0])
-        pos_to_make_none = np.where(stacked_image[0] == min_val)
+        min_val = np.min([np.min(years[0][rows].astype(np.float32, copy=False)) for rows in chunks()])
 
-        # Remove outliers using IQR method
-        mask = np.ones(stacked_image[0].shape, dtype=bool)
-        mask[pos_to_make_none] = False
+        # Remove outliers using IQR method: Q1 and Q3 of each year, background excluded
+        def foreground_values(year: np.ndarray):
+            def value_chunks():
+                for rows in chunks():
+                    values = year[rows].astype(np.float32, copy=False)
+                    keep = (years[0][rows].astype(np.float32, copy=False) != min_val) & ~np.isnan(values)
+                    yield values[keep]
+            return value_chunks
 
-        # Calculate Q1 and Q3 for each year
-        Q1_values = [np.nanpercentile(stacked_image[i][mask], 25) for i in range(5)]
-        Q3_values = [np.nanpercentile(stacked_image[i][mask], 75) for i in range(5)]
+        Q1_values, Q3_values = zip(*[self._nan_percentiles(foreground_values(year), [25, 75]) for year in years])
 
         Q1_avg = np.mean(Q1_values)
         Q3_avg = np.mean(Q3_values)
@@ -49,68 +151,301 @@ class ClusteringService:
         outlier_range_min = Q1_avg - 1.5 * (Q3_avg - Q1_avg)
         outlier_range_max = Q3_avg + 1.5 * (Q3_avg - Q1_avg)
 
-        mean_of_each_pixel = np.mean(stacked_image, axis=0)
-
-        # Mark outliers as None
-        outlier_positions = np.where(
-            (mean_of_each_pixel < outlier_range_min) |
-            (mean_of_each_pixel > outlier_range_max)
-        )
-
-        print(f"Background pixels: {pos_to_make_none[0].shape}")
+        # Mark outliers as None and count the pixels that are not NaN in every year
+        num_background = 0
+        num_valid = 0
+        outlier_indices = [np.empty(0, dtype=np.intp)]
+        for rows in chunks():
+            block = pixel_block(rows)
+            num_background += np.count_nonzero(block[:, 0] == min_val)
+            mean_of_each_pixel = np.mean(block, axis=1)
+            outlier_indices.append(rows.start + np.flatnonzero(
+                (mean_of_each_pixel < outlier_range_min) |
+                (mean_of_each_pixel > outlier_range_max)
+            ))
+            num_valid += np.count_nonzero(~np.isnan(block).all(axis=1))
+        outlier_positions = np.unravel_index(np.concatenate(outlier_indices), shape)
+
+        print(f"Background pixels: {num_background}")
         print(f"Outliers: {outlier_positions[0].shape}")
 
-        # Create flattened vector of 5-year pixels
-        a = stacked_image.shape
-        vector_of_5_years = []
-
-        for i in range(a[1]):  # height
-            for j in range(a[2]):  # width
-                stack_list = [stacked_image[k][i][j] for k in range(a[0])]
-                vector_of_5_years.append(stack_list)
-
-        stacked_vector = np.array(vector_of_5_years)
-
-        # Remove None/NaN values
-        pixels_with_no_none = []
-        temp = ~np.isnan(stacked_vector)
-
-        for i in range(temp.shape[0]):
-            if True in temp[i]:
-                pixels_with_no_none.append(stacked_vector[i])
-
-        pixels_with_no_none = np.array(pixels_with_no_none)
+        # Copy the pixels that are not NaN in every year into the pixel matrix
+        pixels_with_no_none = self._allocate((num_valid, num_years), np.float32)
+        valid_pixel_indices = self._allocate((num_valid,), np.intp)
+        filled = 0
+        for rows in chunks():
+            block = pixel_block(rows)
+            valid = np.flatnonzero(~np.isnan(block).all(axis=1))
+            pixels_with_no_none[filled:filled + len(valid)] = block[valid]
+            valid_pixel_indices[filled:filled + len(valid)] = rows.start + valid
+            filled += len(valid)
 
         print(f"Valid pixels for clustering: {pixels_with_no_none.shape}")
 
-        return pixels_with_no_none, stacked_image.shape[1:], outlier_positions
+        return pixels_with_no_none, tuple(shape), outlier_positions, valid_pixel_indices
+
+    def _nan_percentiles(self, value_chunks: Callable[[], Iterator[np.ndarray]], percentiles: List[float]) -> np.ndarray:
+        """
+        np.nanpercentile (linear interpolation) of float32 values streamed in chunks
+        value_chunks() yields the NaN-free values and is read twice: the needed order statistics
+        are located by the high, then the low 16 bits of an order-preserving integer key, so
+        memory stays at a few 65536-bin histograms however many values there are
+        """
+        chunks = value_chunks()
+        first_chunk, second_chunk = next(chunks, None), next(chunks, None)
+        if second_chunk is None:
+            # Everything fits in one chunk
+            if first_chunk is None or len(first_chunk) == 0:
+                return np.full(len(percentiles), np.nan)
+            return np.percentile(first_chunk, percentiles)
+
+        high_counts = np.zeros(65536, dtype=np.int64)
+        for values in value_chunks():
+            high_counts += np.bincount(self._sort_keys(values) >> 16, minlength=65536)
+
+        count = int(high_counts.sum())
+        if count == 0:
+            return np.full(len(percentiles), np.nan)
+
+        positions = np.asarray(percentiles, dtype=np.float64) / 100 * (count - 1)
+        ranks = np.unique(np.concatenate([np.floor(positions), np.ceil(positions)]).astype(np.int64))
+        high_ends = np.cumsum(high_counts)
+        rank_buckets = np.searchsorted(high_ends, ranks, side='right')
+        ranks_in_bucket = ranks - (high_ends[rank_buckets] - high_counts[rank_buckets])
+
+        buckets = np.unique(rank_buckets)
+        low_counts = np.zeros((len(buckets), 65536), dtype=np.int64)
+        for values in value_chunks():
+            keys = self._sort_keys(values)
+            for index, bucket in enumerate(buckets):
+                low_counts[index] += np.bincount(keys[(keys >> 16) == bucket] & 0xFFFF, minlength=65536)
+
+        order_stats = {}
+        for rank, bucket, rank_in_bucket in zip(ranks, rank_buckets, ranks_in_bucket):
+            low_ends = np.cumsum(low_counts[np.searchsorted(buckets, bucket)])
+            key = (int(bucket) << 16) | int(np.searchsorted(low_ends, rank_in_bucket, side='right'))
+            order_stats[int(rank)] = float(self._sort_key_to_value(key))
+
+        lower = np.array([order_stats[int(position)] for position in np.floor(positions)])
+        upper = np.array([order_stats[int(position)] for position in np.ceil(positions)])
+        return lower + (upper - lower) * (positions - np.floor(positions))
+
+    @staticmethod
+    def _sort_keys(values: np.ndarray) -> np.ndarray:
+        """uint32 keys that sort like the float32 values (sign bit flipped, negatives inverted)"""
+        bits = np.ascontiguousarray(values, dtype=np.float32).view(np.uint32)
+        return np.where(bits & 0x80000000, ~bits, bits | 0x80000000)
+
+    @staticmethod
+    def _sort_key_to_value(key: int) -> np.float32:
+        """Inverse of _sort_keys for one key"""
+        bits = key ^ 0x80000000 if key & 0x80000000 else ~key & 0xFFFFFFFF
+        return np.array(bits, dtype=np.uint32).view(np.float32)[()]
+
+    def _allocate(self, shape: tuple, dtype) -> np.ndarray:
+        """Empty array, backed by an anonymous temporary file when it exceeds max_memory_mb"""
+        if int(np.prod(shape)) * np.dtype(dtype).itemsize <= self.max_memory_mb * 1024 * 1024:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(tempfile.TemporaryFile(), dtype=dtype, mode='w+', shape=shape)
 
     def perform_affinity_propagation(
         self,
         data: np.ndarray,
         damping: float = 0.9,
         preference: int = -10
-    ) -> np.ndarray:
+    ) -> tuple:
         """
         Perform Affinity Propagation clustering
+        Uses the exact or sampled backend depending on clustering_backend and the pixel count
+        With dedup_precision set, identical rounded pixel vectors are clustered once
+        (skipped when the pixel matrix exceeds max_memory_mb, since np.unique sorts a full copy)
+
+        Returns (labels, exemplar_rows): exemplar_rows[k] is the row of data that is the
+        exemplar of cluster k
         """
+        weights = None
+        inverse = None
+        if self.dedup_precision > 0 and data.nbytes > self.max_memory_mb * 1024 * 1024:
+            print("Skipping deduplication: pixel matrix exceeds the memory ceiling")
+        elif self.dedup_precision > 0:
+            quantized = np.round(data / self.dedup_precision) * self.dedup_precision
+            data, first_rows, inverse, weights = np.unique(
+                quantized, axis=0, return_index=True, return_inverse=True, return_counts=True
+            )
+            inverse = inverse.reshape(-1)
+            print(f"Deduplicated {len(quantized)} pixels to {len(data)} unique vectors")
+
         print("Normalizing data...")
+        data_normalized = self._standardize(data, weights)
+
+        backend = self.clustering_backend
+        if backend == 'auto':
+            backend = 'exact' if len(data_normalized) <= self.max_exact_pixels else 'sampled'
+
+        if backend == 'exact':
+            print("Running Affinity Propagation clustering...")
+            labels, exemplar_rows = self._fit_affinity_propagation(data_normalized, damping, preference, weights)
+        else:
+            sample = self._stratified_sample(data_normalized, self.max_exact_pixels)
+            print(
+                f"Running Affinity Propagation on a sample of {len(sample)} "
+                f"of {len(data_normalized)} pixels..."
+            )
+            _, sample_exemplar_rows = self._fit_affinity_propagation(
+                data_normalized[sample],
+                damping,
+                preference,
+                None if weights is None else weights[sample]
+            )
+            exemplar_rows = sample[sample_exemplar_rows]
+            labels = self._assign_to_exemplars(data_normalized, data_normalized[exemplar_rows])
+
+        if inverse is not None:
+            # Broadcast the unique vectors' labels back to every pixel
+            labels = labels[inverse]
+            exemplar_rows = first_rows[exemplar_rows]
+
+        print(f"Total number of clusters: {np.max(labels) + 1}")
+
+        return labels, exemplar_rows
+
+    def warm_start_clustering(self, data: np.ndarray, exemplar_rows: np.ndarray) -> np.ndarray:
+        """
+        Cluster by assigning every pixel to the nearest of the given exemplar pixels
+        Used for incremental re-analysis: a previous run's exemplars seed the clustering
+        instead of running Affinity Propagation again (label k belongs to exemplar_rows[k])
+        """
+        print(f"Assigning pixels to {len(exemplar_rows)} exemplars from the previous analysis...")
+        data_normalized = self._standardize(data)
+        labels = self._assign_to_exemplars(data_normalized, data_normalized[exemplar_rows])
+
+        print(f"Total number of clusters: {np.max(labels) + 1}")
+
+        return labels
+
+    def _standardize(self, data: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        StandardScaler fitted and applied in row chunks
+        The float32 result is file-backed when it exceeds max_memory_mb
+        """
+        bytes_per_row = 8 * 2 * data.shape[1]
         scaler = StandardScaler()
-        data_normalized = scaler.fit_transform(data)
+        for rows in self._row_chunks(len(data), bytes_per_row):
+            scaler.partial_fit(data[rows], sample_weight=None if weights is None else weights[rows])
+
+        data_normalized = self._allocate(data.shape, np.float32)
+        for rows in self._row_chunks(len(data), bytes_per_row):
+            data_normalized[rows] = scaler.transform(data[rows])
+        return data_normalized
+
+    def _warm_start_rows(
+        self,
+        warm_start: Optional[Dict[str, Any]],
+        shape: tuple,
+        valid_pixel_indices: np.ndarray
+    ) -> Optional[np.ndarray]:
+        """
+        Rows of the current pixel matrix holding the previous run's exemplar pixels
+        Returns None (run full clustering) when the raster changed shape or fewer than
+        two of the exemplar pixels are still valid
+        """
+        if not warm_start or list(warm_start.get('raster_shape') or []) != list(shape):
+            return None
+
+        seeds = np.asarray(warm_start.get('exemplar_indices') or [], dtype=np.int64)
+        positions = np.searchsorted(valid_pixel_indices, seeds)
+        found = positions < len(valid_pixel_indices)
+        found[found] = valid_pixel_indices[positions[found]] == seeds[found]
+
+        exemplar_rows = np.unique(positions[found])
+        if len(exemplar_rows) < 2:
+            return None
+        return exemplar_rows
+
+    def _fit_affinity_propagation(
+        self,
+        data: np.ndarray,
+        damping: float,
+        preference: int,
+        weights: Optional[np.ndarray] = None
+    ) -> tuple:
+        """
+        Run Affinity Propagation and return (labels, exemplar_rows)
+        With weights (number of pixels each row stands for) the similarity of row i to
+        every candidate exemplar is scaled by weights[i], so a row counts as much as all
+        of its duplicates would (weighted Affinity Propagation)
+        """
+        if weights is None:
+            affinity_propagation = AffinityPropagation(
+                damping=damping,
+                preference=preference,
+                random_state=42
+            )
+            affinity_propagation.fit(data)
+            return affinity_propagation.labels_, affinity_propagation.cluster_centers_indices_
+
+        squared_norms = np.einsum('ij,ij->i', data, data)
+        similarity = 2 * data @ data.T
+        similarity -= squared_norms[:, None]
+        similarity -= squared_norms[None, :]
+        np.minimum(similarity, 0, out=similarity)
+        similarity *= weights[:, None]
 
-        print("Running Affinity Propagation clustering...")
         affinity_propagation = AffinityPropagation(
             damping=damping,
             preference=preference,
+            affinity='precomputed',
             random_state=42
         )
-        affinity_propagation.fit(data_normalized)
+        affinity_propagation.fit(similarity)
+        return affinity_propagation.labels_, affinity_propagation.cluster_centers_indices_
 
-        labels = affinity_propagation.labels_
-        print(f"Total number of clusters: {np.max(labels) + 1}")
+    def _stratified_sample(self, data: np.ndarray, sample_size: int, num_strata: int = 20) -> np.ndarray:
+        """
+        Pick sample_size row indices spread over the range of mean NDVI
+        Each stratum (quantile bin of the per-pixel mean) contributes in proportion to its size
+        """
+        rng = np.random.default_rng(42)
+        pixel_means = data.mean(axis=1)
+        edges = np.quantile(pixel_means, np.linspace(0, 1, num_strata + 1)[1:-1])
+        strata = np.searchsorted(edges, pixel_means, side='right')
+        stratum_sizes = np.bincount(strata, minlength=num_strata)
+
+        sample = []
+        for stratum, stratum_size in enumerate(stratum_sizes):
+            if stratum_size == 0:
+                continue
+            take = max(1, int(round(sample_size * stratum_size / len(data))))
+            members = np.flatnonzero(strata == stratum)
+            sample.append(rng.choice(members, size=min(take, stratum_size), replace=False))
+
+        return np.sort(np.concatenate(sample))
+
+    def _assign_to_exemplars(self, data: np.ndarray, exemplars: np.ndarray) -> np.ndarray:
+        """
+        Label every row with its nearest exemplar (squared euclidean distance)
+        Works in chunks so the distance matrix stays within max_memory_mb
+        """
+        if len(exemplars) == 0:
+            # Affinity Propagation did not converge
+            return np.full(len(data), -1)
+
+        labels = self._allocate((len(data),), np.int64)
+        exemplar_norms = np.einsum('ij,ij->i', exemplars, exemplars)
+
+        for rows in self._row_chunks(len(data), 8 * 2 * len(exemplars)):
+            # |x - e|^2 without the |x|^2 term, which is the same for every exemplar
+            distances = exemplar_norms - 2 * data[rows] @ exemplars.T
+            labels[rows] = np.argmin(distances, axis=1)
 
         return labels
 
+    def _row_chunks(self, num_rows: int, bytes_per_row: int):
+        """Row slices sized so one chunk's temporaries stay within max_memory_mb"""
+        chunk_rows = max(1024, self.max_memory_mb * 1024 * 1024 // max(bytes_per_row, 1))
+        for start in range(0, num_rows, chunk_rows):
+            yield slice(start, start + chunk_rows)
+
     def calculate_threshold_and_map_to_classes(
         self,
         labels: np.ndarray,
@@ -119,17 +454,23 @@ class ClusteringService:
         """
         Calculate mean threshold and map clusters to 6 classes
         Based on temporal analysis (how many years show high vs low values)
+        Returns uint8 class labels 1..(years + 1), one per row of data
+        Works through data in row chunks so large (tiled) fields stay within max_memory_mb
         """
-        # Group pixels by cluster
-        cluster_values = {}
-        for label in set(labels):
-            cluster_values[label] = data[labels == label]
-
-        # Calculate mean for each cluster
-        cluster_means = []
-        for label in sorted(cluster_values.keys()):
-            mean_val = np.mean([np.mean(pixel) for pixel in cluster_values[label]])
-            cluster_means.append(mean_val)
+        bytes_per_row = 8 * data.shape[1]
+
+        # Mean NDVI of each cluster (mean of its pixels' multi-year means)
+        # Bins are shifted by one so label -1 (Affinity Propagation did not converge) counts too
+        num_bins = int(np.max(labels)) + 2
+        cluster_sums = np.zeros(num_bins)
+        cluster_sizes = np.zeros(num_bins, dtype=np.int64)
+        for rows in self._row_chunks(len(data), bytes_per_row):
+            bins = labels[rows] + 1
+            cluster_sums += np.bincount(bins, weights=np.mean(data[rows], axis=1), minlength=num_bins)
+            cluster_sizes += np.bincount(bins, minlength=num_bins)
+        present = np.flatnonzero(cluster_sizes)
+        cluster_ids = present - 1
+        cluster_means = cluster_sums[present] / cluster_sizes[present]
 
         # Calculate global threshold (average of all cluster means)
         threshold = np.mean(cluster_means)
@@ -139,68 +480,69 @@ class ClusteringService:
         sorted_indices = np.argsort(cluster_means)
 
         # Map old labels to sorted labels
-        label_mapper = {old_label: new_label for new_label, old_label in enumerate(sorted_indices)}
+        label_mapper = {
+            int(cluster_ids[old_index]): new_label
+            for new_label, old_index in enumerate(sorted_indices)
+        }
 
         # For each pixel, count how many years exceed threshold
-        # This creates the 6-class classification:
+        # This creates the 6-class classification (for 5 years of imagery):
         # Class 1: 0 years above threshold (poorest)
         # Class 2: 1 year above threshold
         # Class 3: 2 years above threshold
         # Class 4: 3 years above threshold
         # Class 5: 4 years above threshold
         # Class 6: 5 years above threshold (best)
+        six_class_labels = np.empty(len(data), dtype=np.uint8)
+        for rows in self._row_chunks(len(data), bytes_per_row):
+            six_class_labels[rows] = (data[rows] >= threshold).sum(axis=1) + 1
 
-        six_class_labels = []
-        for pixel in data:
-            years_above_threshold = sum(1 for value in pixel if value >= threshold)
-            six_class_labels.append(years_above_threshold + 1)  # Classes 1-6
-
-        return np.array(six_class_labels), threshold, label_mapper
+        return six_class_labels, threshold, label_mapper
 
     def create_classification_map(
         self,
         labels: np.ndarray,
         shape: tuple,
-        outlier_positions: tuple
+        outlier_positions: tuple,
+        valid_pixel_indices: np.ndarray
     ) -> np.ndarray:
         """
         Create 2D classification map from 1D labels
+        Each label is placed at its pixel's flat index from stack_and_preprocess;
+        dropped pixels and outliers are set to NODATA
         """
-        # Create base map
-        classification_map = np.ones(shape)
+        classification_map = np.full(shape, self.NODATA, dtype=np.uint8)
 
-        # Fill in labels
-        valid_pixel_idx = 0
-        for i in range(shape[0]):
-            for j in range(shape[1]):
-                if valid_pixel_idx < len(labels):
-                    classification_map[i, j] = labels[valid_pixel_idx]
-                    valid_pixel_idx += 1
+        # Scatter labels back to the pixels they were computed for
+        classification_map.ravel()[valid_pixel_indices] = labels
 
-        # Mark outliers as NaN
-        classification_map[outlier_positions] = np.nan
+        # Mark outliers as no data
+        classification_map[outlier_positions] = self.NODATA
 
         return classification_map
 
-    def map_to_image_base64(self, classification_map: np.ndarray) -> str:
+    def render_map(self, classification_map: np.ndarray) -> tuple:
         """
-        Convert classification map to base64 encoded PNG image
-        Reduced size for better performance
+        Render the uint8 classification map as a palette image
+        Returns (image_bytes, mime_type); NODATA pixels are transparent
         """
-        plt.figure(figsize=(6, 6))
-        plt.axis('off')
-        plt.imshow(classification_map, cmap=self.colormap_6class, vmin=1, vmax=6)
-        plt.grid(False)
+        image = Image.fromarray(np.ascontiguousarray(classification_map, dtype=np.uint8))
+        image.putpalette(self.map_palette)  # L -> P
+        image.info['transparency'] = self.NODATA
 
-        # Save to bytes buffer with reduced DPI for smaller file size
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0, dpi=100)
-        plt.close()
+        # Upscale with nearest neighbour so every field pixel stays a sharp block
+        height, width = classification_map.shape
+        scale = max(1, self.map_size // max(height, width, 1))
+        if scale > 1:
+            image = image.resize((width * scale, height * scale), Image.NEAREST)
 
-        buf.seek(0)
-        img_base64 = base64.b64encode(buf.read()).decode('utf-8')
+        buf = io.BytesIO()
+        if self.map_format == 'webp':
+            image.convert('RGBA').save(buf, format='WEBP', lossless=True)
+            return buf.getvalue(), 'image/webp'
 
-        return f"data:image/png;base64,{img_base64}"
+        image.save(buf, format='PNG', optimize=True)
+        return buf.getvalue(), 'image/png'
 
     def calculate_classification_percentages(
         self,
@@ -236,21 +578,38 @@ class ClusteringService:
 
         return int(score)
 
-    async def perform_clustering(
+    def compute_clustering(
         self,
         ndvi_arrays: List[np.ndarray],
-        metadata: List[Dict[str, Any]]
+        warm_start: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
-        Main method to perform clustering and generate 6-class map
+        Run all CPU-bound clustering stages and generate the 6-class map
+        Safe to call from a worker process
+
+        warm_start is the exemplar_indices/raster_shape pair of a previous result for the
+        same field; when it still fits the raster, clustering reuses those exemplars
         """
         print("\n=== Starting Clustering Analysis ===")
 
-        # Step 1: Stack and preprocess
-        pixels, shape, outlier_positions = self.stack_and_preprocess(ndvi_arrays)
+        # Stage timings are returned with the result because metrics recorded
+        # inside a worker process never reach the server's registry
+        stage_seconds = {}
 
-        # Step 2: Perform Affinity Propagation
-        cluster_labels = self.perform_affinity_propagation(pixels)
+        # Step 1: Stack and preprocess
+        started = time.perf_counter()
+        pixels, shape, outlier_positions, valid_pixel_indices = self.stack_and_preprocess(ndvi_arrays)
+        stage_seconds['stack_preprocess'] = time.perf_counter() - started
+
+        # Step 2: Perform Affinity Propagation, or seed from the previous run's exemplars
+        started = time.perf_counter()
+        exemplar_rows = self._warm_start_rows(warm_start, shape, valid_pixel_indices)
+        if exemplar_rows is not None:
+            cluster_labels = self.warm_start_clustering(pixels, exemplar_rows)
+            stage_seconds['warm_start'] = time.perf_counter() - started
+        else:
+            cluster_labels, exemplar_rows = self.perform_affinity_propagation(pixels)
+            stage_seconds['affinity_propagation'] = time.perf_counter() - started
 
         # Step 3: Map to 6 classes based on temporal analysis
         six_class_labels, threshold, label_mapper = self.calculate_threshold_and_map_to_classes(
@@ -262,7 +621,8 @@ class ClusteringService:
         classification_map = self.create_classification_map(
             six_class_labels,
             shape,
-            outlier_positions
+            outlier_positions,
+            valid_pixel_indices
         )
 
         # Step 5: Calculate percentages
@@ -272,7 +632,9 @@ class ClusteringService:
         profitability_score = self.calculate_profitability_score(percentages)
 
         # Step 7: Generate map image
-        map_base64 = self.map_to_image_base64(classification_map)
+        started = time.perf_counter()
+        map_image, map_mime_type = self.render_map(classification_map)
+        stage_seconds['map_render'] = time.perf_counter() - started
 
         print(f"\nClassification percentages: {percentages}")
         print(f"Profitability score: {profitability_score}")
@@ -280,9 +642,109 @@ class ClusteringService:
 
         return {
             'classification_percentages': percentages,
-            'map_base64': map_base64,
+            'map_image': map_image,
+            'map_mime_type': map_mime_type,
             'profitability_score': profitability_score,
             'threshold': float(threshold),
             'num_clusters': int(np.max(cluster_labels) + 1),
-            'classification_map': classification_map.tolist()  # For storage
+            'num_pixels': int(len(pixels)),
+            'warm_start': 'warm_start' in stage_seconds,
+            # Flat raster indices of the exemplar pixels, for warm-starting the next run
+            'exemplar_indices': valid_pixel_indices[exemplar_rows].tolist(),
+            'raster_shape': list(shape),
+            'stage_seconds': stage_seconds
         }
+
+    async def perform_clustering(
+        self,
+        ndvi_arrays: List[np.ndarray],
+        metadata: List[Dict[str, Any]],
+        warm_start: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Main method to perform clustering and generate 6-class map
+        Runs in the process pool when one is configured so the event loop stays free
+        Memory-mapped arrays are handed to the worker by file name rather than pickled
+        """
+        if self._executor is None:
+            return self._record_metrics(self.compute_clustering(ndvi_arrays, warm_start))
+
+        if self._slots is None:
+            # Created lazily so it binds to the running event loop
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue_size)
+
+        if self._slots.locked():
+            raise ClusteringQueueFullError(
+                f"All {self.max_workers} clustering workers are busy and {self.max_queue_size} runs are waiting"
+            )
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor,
+                _compute_clustering_in_worker,
+                [_array_reference(array) for array in ndvi_arrays],
+                warm_start
+            )
+        return self._record_metrics(result)
+
+    @staticmethod
+    def _record_metrics(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the stage timings and sizes reported by compute_clustering"""
+        for stage, seconds in result['stage_seconds'].items():
+            PIPELINE_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+        ANALYSIS_PIXELS.observe(result['num_pixels'])
+        ANALYSIS_CLUSTERS.observe(result['num_clusters'])
+        return result
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# One ClusteringService per worker process, created by the pool initializer
+_worker_service: Optional[ClusteringService] = None
+
+
+def _init_worker(settings: Dict[str, Any]):
+    """Create the worker's ClusteringService with the parent's clustering settings"""
+    global _worker_service
+    _worker_service = ClusteringService(**settings)
+
+
+def _compute_clustering_in_worker(
+    ndvi_arrays: List[Any],
+    warm_start: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Entry point for the process pool"""
+    return _worker_service.compute_clustering([_open_array(array) for array in ndvi_arrays], warm_start)
+
+
+def _array_reference(array: np.ndarray) -> Any:
+    """
+    Describe a file-backed array (tiled download, cached raster) by its file and offset so
+    the worker maps the same file instead of receiving a pickled copy; other arrays pass as is
+    """
+    root = array
+    while isinstance(root.base, np.memmap):
+        root = root.base
+    if (
+        not isinstance(root, np.memmap) or root.filename is None
+        or not array.flags.c_contiguous or array.size == 0
+    ):
+        return array
+    return {
+        'filename': root.filename,
+        'offset': root.offset + (array.ctypes.data - root.ctypes.data),
+        'dtype': array.dtype.str,
+        'shape': array.shape
+    }
+
+
+def _open_array(array: Any) -> np.ndarray:
+    """Map an array described by _array_reference (read-only)"""
+    if isinstance(array, np.ndarray):
+        return array
+    return np.memmap(array['filename'], dtype=array['dtype'], mode='r', offset=array['offset'], shape=array['shape'])
@@ -4,6 +4,8 @@ import json
 import datetime
 import requests
 
+from services.metrics import PIPELINE_STAGE_SECONDS, GEMINI_FALLBACKS
+
 
 class GeminiCropRecommendation:
     """
@@ -47,7 +49,8 @@ class GeminiCropRecommendation:
 
         try:
             # Generate content using Gemini
-            response = self.model.generate_content(prompt)
+            with PIPELINE_STAGE_SECONDS.labels(stage='gemini').time():
+                response = self.model.generate_content(prompt)
 
             # Parse the response
             recommendations = self._parse_recommendations(response.text, field_data)
@@ -56,6 +59,7 @@ class GeminiCropRecommendation:
 
         except Exception as e:
             print(f"Gemini API error: {str(e)}")
+            GEMINI_FALLBACKS.labels(reason='api_error').inc()
             # Return fallback recommendations
             return self._get_fallback_recommendations(field_data)
 
@@ -176,6 +180,7 @@ CRITICAL REQUIREMENTS:
                 recommendations = recommendations[:3]
             elif len(recommendations) < 3:
                 # Add fallback recommendations if needed
+                GEMINI_FALLBACKS.labels(reason='incomplete_response').inc()
                 recommendations.extend(
                     self._get_fallback_recommendations(field_data)[len(recommendations):]
                 )
@@ -192,6 +197,7 @@ CRITICAL REQUIREMENTS:
         except Exception as e:
             print(f"Failed to parse Gemini response: {str(e)}")
             print(f"Response text: {response_text}")
+            GEMINI_FALLBACKS.labels(reason='parse_error').inc()
             return self._get_fallback_recommendations(field_data)
 
     def _get_coordinates(self, location_name: str) -> Optional[Dict[str, Any]]:
@@ -200,7 +206,8 @@ CRITICAL REQUIREMENTS:
         """
         try:
             params = {"name": location_name, "count": 1, "language": "en", "format": "json"}
-            response = requests.get(self.GEO_API_URL, params=params, timeout=5)
+            with PIPELINE_STAGE_SECONDS.labels(stage='geocoding').time():
+                response = requests.get(self.GEO_API_URL, params=params, timeout=5)
             data = response.json()
 
             if "results" in data and data["results"]:
@@ -227,7 +234,8 @@ CRITICAL REQUIREMENTS:
                 "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum",
                 "timezone": "auto"
             }
-            response = requests.get(self.WEATHER_API_URL, params=params, timeout=5)
+            with PIPELINE_STAGE_SECONDS.labels(stage='weather').time():
+                response = requests.get(self.WEATHER_API_URL, params=params, timeout=5)
             data = response.json()
 
             # Safe extraction
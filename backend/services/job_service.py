@@ -0,0 +1,144 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class JobQueueFullError(Exception):
+    """Raised when no more analysis jobs can be queued"""
+
+
+class JobService:
+    """
+    Service for running field analyses as background jobs
+    Jobs wait in a bounded queue and are picked up by a fixed pool of workers
+    """
+
+    # Pipeline stages reported while a job is running
+    STAGES = ['queued', 'ndvi', 'clustering', 'recommendations', 'persist', 'done']
+
+    def __init__(
+        self,
+        num_workers: int = 2,
+        max_queue_size: int = 20,
+        max_finished_jobs: int = 500
+    ):
+        """
+        Args:
+            num_workers: Number of jobs processed at the same time
+            max_queue_size: Number of jobs allowed to wait for a worker
+            max_finished_jobs: Number of completed/failed jobs kept for polling
+        """
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.max_finished_jobs = max_finished_jobs
+
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.finished_job_ids: List[str] = []
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+
+    def start(self):
+        """Create the queue and start the worker tasks (must run inside the event loop)"""
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.workers = [
+            asyncio.create_task(self._worker(worker_id))
+            for worker_id in range(self.num_workers)
+        ]
+        print(f"[Jobs] Started {self.num_workers} workers (queue size: {self.max_queue_size})")
+
+    async def stop(self):
+        """Cancel the worker tasks"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def submit(
+        self,
+        handler: Callable[[Callable[..., None]], Awaitable[Any]],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Queue a job and return its id right away
+
+        handler is awaited by a worker with a progress callback
+        progress(event, data=None); events named after a stage in STAGES move the job to that stage
+        """
+        if self.queue is None:
+            raise RuntimeError("JobService has not been started")
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "last_event": None,
+            "detail": None,
+            "metadata": metadata or {},
+            "result": None,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None
+        }
+
+        try:
+            self.queue.put_nowait((job_id, handler))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Job queue is full ({self.max_queue_size} jobs waiting)")
+
+        self.jobs[job_id] = job
+        print(f"[Jobs] Queued job {job_id} ({self.queue.qsize()} waiting)")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the current state of a job"""
+        return self.jobs.get(job_id)
+
+    def record_progress(self, job_id: str, event: str, data: Optional[Dict[str, Any]] = None):
+        """Record a progress event and the pipeline stage a job has reached"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if event in self.STAGES:
+            job["stage"] = event
+        job["last_event"] = event
+        job["detail"] = data
+
+    async def _worker(self, worker_id: int):
+        """Take jobs off the queue and run them one at a time"""
+        while True:
+            job_id, handler = await self.queue.get()
+            job = self.jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = datetime.utcnow().isoformat()
+            print(f"[Jobs] Worker {worker_id} started job {job_id}")
+
+            def progress(event: str, data: Optional[Dict[str, Any]] = None):
+                self.record_progress(job_id, event, data)
+
+            try:
+                job["result"] = await handler(progress)
+                job["status"] = "completed"
+                job["stage"] = "done"
+                print(f"[Jobs] ✅ Job {job_id} completed")
+            except asyncio.CancelledError:
+                job["status"] = "failed"
+                job["error"] = "Job cancelled"
+                raise
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                print(f"[Jobs] ❌ Job {job_id} failed: {str(e)}")
+            finally:
+                job["finished_at"] = datetime.utcnow().isoformat()
+                self.finished_job_ids.append(job_id)
+                self._prune_finished_jobs()
+                self.queue.task_done()
+
+    def _prune_finished_jobs(self):
+        """Forget the oldest finished jobs so the job table stays bounded"""
+        while len(self.finished_job_ids) > self.max_finished_jobs:
+            old_job_id = self.finished_job_ids.pop(0)
+            self.jobs.pop(old_job_id, None)
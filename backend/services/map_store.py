@@ -0,0 +1,78 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class MapStore:
+    """
+    Storage for rendered classification maps, served as images instead of inline base64
+    Maps are keyed by a hash of the image bytes, so a map is stored once and its id doubles
+    as a strong ETag. Recent maps are kept in memory; with MongoDB available every map is
+    also persisted so its URL keeps working after a restart
+    """
+
+    # File extension used in map URLs for each image type
+    EXTENSIONS = {'image/png': 'png', 'image/webp': 'webp'}
+
+    def __init__(self, mongodb_service=None, max_entries: int = 256):
+        """
+        Args:
+            mongodb_service: MongoDBService used to persist maps (None keeps them in memory only)
+            max_entries: Number of maps kept in memory
+        """
+        self.mongodb_service = mongodb_service
+        self.max_entries = max_entries
+        self._maps: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def map_id(image_bytes: bytes) -> str:
+        """Content hash identifying a rendered map"""
+        return hashlib.sha256(image_bytes).hexdigest()[:32]
+
+    @classmethod
+    def url(cls, field_id: str, map_id: str, mime_type: str) -> str:
+        """Path of the map endpoint for a stored map"""
+        return f"/api/fields/{field_id}/maps/{map_id}.{cls.EXTENSIONS[mime_type]}"
+
+    def put(self, field_id: str, image_bytes: bytes, mime_type: str) -> str:
+        """Store a rendered map and return its id"""
+        map_id = self.map_id(image_bytes)
+        entry = {'field_id': field_id, 'map_id': map_id, 'image': image_bytes, 'mime_type': mime_type}
+
+        self._remember(entry)
+
+        if self.mongodb_service:
+            try:
+                self.mongodb_service.save_map(field_id, map_id, image_bytes, mime_type)
+            except Exception as e:
+                # The in-memory copy still serves the map
+                print(f"[Maps] ⚠️ Failed to persist map {map_id}: {str(e)}")
+
+        return map_id
+
+    def get(self, field_id: str, map_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a map by field and id: {'image', 'mime_type', ...} or None"""
+        entry = self._maps.get((field_id, map_id))
+        if entry is not None:
+            self._maps.move_to_end((field_id, map_id))
+            return entry
+
+        if self.mongodb_service:
+            entry = self.mongodb_service.get_map(field_id, map_id)
+            if entry is not None:
+                self._remember(entry)
+            return entry
+
+        return None
+
+    def discard(self, field_id: str, map_ids: List[str]):
+        """Forget in-memory copies of maps that were deleted from MongoDB"""
+        for map_id in map_ids:
+            self._maps.pop((field_id, map_id), None)
+
+    def _remember(self, entry: Dict[str, Any]):
+        key = (entry['field_id'], entry['map_id'])
+        self._maps[key] = entry
+        self._maps.move_to_end(key)
+        while len(self._maps) > self.max_entries:
+            self._maps.popitem(last=False)
@@ -0,0 +1,36 @@
+"""
+Prometheus metrics for the field analysis pipeline
+Exposed by the /metrics endpoint in main.py (one registry per server process)
+"""
+from prometheus_client import Counter, Histogram
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    'agroindia_pipeline_stage_seconds',
+    'Time spent in each field analysis pipeline stage',
+    ['stage'],  # scene_search, ndvi_download, stack_preprocess, affinity_propagation, warm_start, map_render, gemini, geocoding, weather, mongo_save
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+
+EE_GETINFO_CALLS = Counter(
+    'agroindia_ee_getinfo_calls_total',
+    'Earth Engine getInfo() round trips',
+    ['call']
+)
+
+GEMINI_FALLBACKS = Counter(
+    'agroindia_gemini_fallbacks_total',
+    'Crop recommendations served from the rule-based fallback instead of Gemini',
+    ['reason']  # api_error, parse_error, incomplete_response
+)
+
+ANALYSIS_PIXELS = Histogram(
+    'agroindia_analysis_pixels',
+    'Valid pixels clustered per analysis',
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+)
+
+ANALYSIS_CLUSTERS = Histogram(
+    'agroindia_analysis_clusters',
+    'Affinity Propagation clusters found per analysis',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
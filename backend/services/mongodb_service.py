@@ -4,6 +4,8 @@ from datetime import datetime
 import os
 import sys
 
+from services.metrics import PIPELINE_STAGE_SECONDS
+
 
 class MongoDBService:
     """
@@ -27,19 +29,24 @@ class MongoDBService:
 
             self.db = self.client['AgroIndia']
             self.fields_collection = self.db['Fields']
-            print(f"[MongoDB] Using database: AgroIndia, collection: Fields")
+            self.maps_collection = self.db['Maps']
+            print(f"[MongoDB] Using database: AgroIndia, collections: Fields, Maps")
         except Exception as e:
             print(f"[MongoDB] Connection failed: {str(e)}")
             raise
 
+    @PIPELINE_STAGE_SECONDS.labels(stage='mongo_save').time()
     def save_analysis(
         self,
         field_id: str,
         analysis_data: Dict[str, Any]
-    ) -> bool:
+    ) -> Optional[List[str]]:
         """
         Save analysis result for a field
         Maintains max 2 analyses per field (last and present)
+
+        Returns the ids of the maps deleted along with the analyses that were dropped
+        (empty when none were), or None when the save failed
         """
         try:
             print(f"[MongoDB] Starting save_analysis for field_id: {field_id}", flush=True)
@@ -50,6 +57,9 @@ class MongoDBService:
                 "field_id": field_id,
                 "classification": analysis_data.get("classification"),
                 "classification_map_url": analysis_data.get("classification_map_url"),
+                "map_id": analysis_data.get("map_id"),
+                "exemplar_indices": analysis_data.get("exemplar_indices"),
+                "raster_shape": analysis_data.get("raster_shape"),
                 "ndvi_stats": analysis_data.get("ndvi_stats"),
                 "crop_recommendations": analysis_data.get("crop_recommendations"),
                 "profitability_score": analysis_data.get("profitability_score"),
@@ -73,7 +83,7 @@ class MongoDBService:
 
                 # Keep only last 2 analyses (sorted by created_at)
                 analyses.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-                analyses = analyses[:2]
+                analyses, dropped_analyses = analyses[:2], analyses[2:]
 
                 # Update field document
                 result = self.fields_collection.update_one(
@@ -86,6 +96,16 @@ class MongoDBService:
                     }
                 )
                 print(f"[MongoDB] Update result - Matched: {result.matched_count}, Modified: {result.modified_count}", flush=True)
+
+                # Drop the maps of the dropped analyses that no remaining analysis points to
+                # (maps of analyses still being computed are not referenced yet, so they are left alone)
+                kept_map_ids = {analysis.get("map_id") for analysis in analyses}
+                dropped_map_ids = sorted({
+                    analysis.get("map_id") for analysis in dropped_analyses
+                    if analysis.get("map_id") and analysis.get("map_id") not in kept_map_ids
+                })
+                if dropped_map_ids:
+                    self.maps_collection.delete_many({"field_id": field_id, "map_id": {"$in": dropped_map_ids}})
             else:
                 print(f"[MongoDB] No existing field document, creating new one...", flush=True)
                 # Create new field document
@@ -96,15 +116,16 @@ class MongoDBService:
                     "updated_at": datetime.utcnow().isoformat()
                 })
                 print(f"[MongoDB] Insert result - Inserted ID: {result.inserted_id}", flush=True)
+                dropped_map_ids = []
 
             print(f"[MongoDB] ✅ Successfully saved analysis for field_id: {field_id}", flush=True)
-            return True
+            return dropped_map_ids
 
         except Exception as e:
             print(f"[MongoDB] ❌ Save error: {str(e)}", flush=True)
             import traceback
             traceback.print_exc()
-            return False
+            return None
 
     def get_recent_analysis(self, field_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -139,6 +160,39 @@ class MongoDBService:
             print(f"MongoDB fetch error: {str(e)}")
             return []
 
+    def save_map(self, field_id: str, map_id: str, image_bytes: bytes, mime_type: str):
+        """
+        Store a rendered classification map once per field
+        map_id is a hash of the image, so saving the same map again is a no-op
+        """
+        self.maps_collection.update_one(
+            {"field_id": field_id, "map_id": map_id},
+            {
+                "$setOnInsert": {
+                    "field_id": field_id,
+                    "map_id": map_id,
+                    "image": image_bytes,
+                    "mime_type": mime_type,
+                    "created_at": datetime.utcnow().isoformat()
+                }
+            },
+            upsert=True
+        )
+
+    def get_map(self, field_id: str, map_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored classification map
+        """
+        try:
+            stored_map = self.maps_collection.find_one({"field_id": field_id, "map_id": map_id})
+            if stored_map:
+                stored_map["image"] = bytes(stored_map["image"])
+            return stored_map
+
+        except Exception as e:
+            print(f"MongoDB fetch error: {str(e)}")
+            return None
+
     def close(self):
         """Close MongoDB connection"""
         self.client.close()
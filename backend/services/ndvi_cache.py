@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import uuid
+import weakref
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+
+class NDVIRasterCache:
+    """
+    Persistent on-disk cache for per-year NDVI rasters
+    Entries are keyed by the field polygon, scene search parameters, pixel grid and the area the
+    scene was selected over, and hold the
+    selected scene metadata, the NDVI statistics and the NDVI array (float32 .npy)
+    The least recently used entries are evicted when the cache grows past max_bytes
+
+    Arrays returned by get are mapped from a private hard link of the entry (removed once the
+    array is released), so evicting the entry never pulls the file from under a reader such as
+    a clustering worker that reopens the array by file name
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory holding the cache entries (created if missing)
+            max_bytes: Total size of all entries before the oldest are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lease_dir = os.path.join(cache_dir, 'leases')
+        os.makedirs(self._lease_dir, exist_ok=True)
+        self._remove_stale_leases()
+        print(f"[NDVI Cache] Using {cache_dir} (max {max_bytes / (1024 * 1024):.0f} MB)")
+
+    @staticmethod
+    def normalize_polygon(polygon_coords: List[List[float]]) -> List[Tuple[float, float]]:
+        """
+        Normalize a polygon ring so the same field always hashes the same way
+        Rounds to ~10 cm, drops the closing vertex and ignores start vertex and winding direction
+        """
+        points = [(round(float(point[0]), 6), round(float(point[1]), 6)) for point in polygon_coords]
+        if len(points) > 1 and points[0] == points[-1]:
+            points = points[:-1]
+
+        start = points.index(min(points))
+        points = points[start:] + points[:start]
+        reversed_points = [points[0]] + points[1:][::-1]
+
+        return min(points, reversed_points)
+
+    def make_key(
+        self,
+        polygon_coords: List[List[float]],
+        year: int,
+        target_date: str,
+        max_cloud_cover: int,
+        max_search_days: int,
+        pixel_grid: Optional[Dict[str, Any]] = None,
+        selection_bounds: Optional[List[float]] = None
+    ) -> str:
+        """
+        Build the content hash that identifies one year's raster for a field
+        pixel_grid is the grid of a tiled download (None for sampleRectangle's native grid),
+        since the two give arrays of different shapes
+        selection_bounds are the bounds the scene was selected over when that was not the
+        field itself (batch groups), since a group search may pick a different scene
+        """
+        key_data = json.dumps({
+            'polygon': self.normalize_polygon(polygon_coords),
+            'year': year,
+            'target_date': target_date,
+            'max_cloud_cover': max_cloud_cover,
+            'max_search_days': max_search_days,
+            'pixel_grid': pixel_grid or 'sampleRectangle',
+            'selection_bounds': [round(float(bound), 6) for bound in selection_bounds] if selection_bounds else 'field'
+        }, sort_keys=True)
+        return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a cached entry
+        Returns {'metadata', 'stats', 'ndvi_array'} with the array memory-mapped, or None
+        """
+        meta_path, array_path = self._paths(key)
+
+        try:
+            with open(meta_path) as f:
+                entry = json.load(f)
+            entry['ndvi_array'] = self._load_leased(array_path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch the entry so LRU eviction keeps it
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(
+        self,
+        key: str,
+        metadata: Dict[str, Any],
+        stats: Dict[str, Any],
+        ndvi_array: np.ndarray
+    ):
+        """Store one year's raster and evict old entries if the cache is over its size limit"""
+        meta_path, array_path = self._paths(key)
+
+        # Write to uniquely named temporary files first so readers never see half-written
+        # entries and concurrent puts of the same key never write into each other's files
+        tmp_paths = []
+        try:
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, prefix=key, suffix='.tmp', delete=False) as f:
+                tmp_paths.append(f.name)
+                np.save(f, np.asarray(ndvi_array, dtype=np.float32))
+            os.replace(f.name, array_path)
+
+            with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, prefix=key, suffix='.tmp', delete=False) as f:
+                tmp_paths.append(f.name)
+                json.dump({'metadata': metadata, 'stats': stats}, f)
+            os.replace(f.name, meta_path)
+        except OSError as e:
+            print(f"[NDVI Cache] Failed to store entry {key[:12]}: {str(e)}")
+            for tmp_path in tmp_paths:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return
+
+        self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        entries = self._entries()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'size_bytes': sum(size for _, _, size in entries),
+                'max_bytes': self.max_bytes
+            }
+
+    def _load_leased(self, array_path: str) -> np.ndarray:
+        """Memory-map an entry's array through a hard link that only this array uses"""
+        lease_path = os.path.join(self._lease_dir, f"{os.getpid()}-{uuid.uuid4().hex}.npy")
+        try:
+            os.link(array_path, lease_path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # No hard links on this filesystem: read a private copy instead
+            return np.load(array_path)
+        try:
+            ndvi_array = np.load(lease_path, mmap_mode='r')
+        except Exception:
+            os.remove(lease_path)
+            raise
+        weakref.finalize(ndvi_array, os.remove, lease_path)
+        return ndvi_array
+
+    def _remove_stale_leases(self):
+        """Remove leases left behind by processes that are no longer running"""
+        for file_name in os.listdir(self._lease_dir):
+            try:
+                os.kill(int(file_name.split('-', 1)[0]), 0)
+            except ProcessLookupError:
+                os.remove(os.path.join(self._lease_dir, file_name))
+            except (ValueError, OSError):
+                continue
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.npy'
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        """List (key, last_used, size_bytes) for every complete entry"""
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith('.json'):
+                continue
+            key = file_name[:-len('.json')]
+            meta_path, array_path = self._paths(key)
+            try:
+                last_used = os.path.getmtime(meta_path)
+                size = os.path.getsize(meta_path) + os.path.getsize(array_path)
+            except OSError:
+                continue
+            entries.append((key, last_used, size))
+        return entries
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total_size = sum(size for _, _, size in entries)
+
+        for key, _, size in entries:
+            if total_size <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total_size -= size
+            with self._lock:
+                self.evictions += 1
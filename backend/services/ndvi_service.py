@@ -1,11 +1,17 @@
 import ee
 import numpy as np
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Callable
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import os
 import json
+import math
+import tempfile
+import weakref
+
+from services.ndvi_cache import NDVIRasterCache
+from services.metrics import PIPELINE_STAGE_SECONDS, EE_GETINFO_CALLS
 
 class NDVIService:
     """
@@ -13,13 +19,53 @@ class NDVIService:
     Based on ndvi.py logic
     """
 
-    def __init__(self, project_id: str = None):
+    SCENE_SELECTION_MODES = ('window', 'iterative')
+    FETCH_MODES = ('stacked', 'per_year', 'tiled')
+
+    # Scene search parameters (also part of the raster cache key)
+    MAX_CLOUD_COVER = 20
+    MAX_SEARCH_DAYS = 45
+
+    # Earth Engine's pixel cap for one sampleRectangle request; larger fields are fetched in tiles
+    SAMPLE_RECTANGLE_MAX_PIXELS = 262144
+    TILE_SIZE = 512  # pixels per tile side
+    PIXEL_SIZE_METERS = 30
+
+    def __init__(
+        self,
+        project_id: str = None,
+        max_concurrent_years: int = 5,
+        scene_selection: str = 'window',
+        fetch_mode: str = 'stacked',
+        cache: Optional[NDVIRasterCache] = None
+    ):
         """
         Initialize Earth Engine
 
         Args:
             project_id: Google Cloud Project ID (optional, but recommended)
+            max_concurrent_years: Number of years fetched from Earth Engine at the same time
+                                  (keep low enough to stay within Earth Engine request quotas)
+            scene_selection: 'window' picks the scene from one query over the whole search window,
+                             'iterative' searches day by day
+            fetch_mode: 'stacked' downloads all years' arrays and statistics in one request,
+                        'per_year' downloads each year separately, 'tiled' always downloads
+                        in tiles (fields over SAMPLE_RECTANGLE_MAX_PIXELS are tiled in every mode)
+            cache: Optional on-disk raster cache; cached years skip Earth Engine entirely
         """
+        if scene_selection not in self.SCENE_SELECTION_MODES:
+            raise ValueError(f"scene_selection must be one of {self.SCENE_SELECTION_MODES}, got '{scene_selection}'")
+        self.scene_selection = scene_selection
+        if fetch_mode not in self.FETCH_MODES:
+            raise ValueError(f"fetch_mode must be one of {self.FETCH_MODES}, got '{fetch_mode}'")
+        self.fetch_mode = fetch_mode
+        self.cache = cache
+        self.max_concurrent_years = max(1, max_concurrent_years)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_years,
+            thread_name_prefix="ndvi-year"
+        )
+
         try:
             # Check for service account credentials (for production)
             service_account_key = os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY")
@@ -135,11 +181,11 @@ class NDVIService:
                                     .filter(ee.Filter.lt('CLOUD_COVER', max_cloud_cover))
 
             # Check if we have images
-            count = daily_images.size().getInfo()
+            count = self._get_info(daily_images.size(), 'daily_image_count')
             if count > 0:
                 images_found += 1
                 image = daily_images.sort('CLOUD_COVER').first()
-                cloud_cover = image.get('CLOUD_COVER').getInfo()
+                cloud_cover = self._get_info(image.get('CLOUD_COVER'), 'cloud_cover')
 
                 days_diff = abs((search_date - target_date).days)
                 print(f"    {date_str} (±{days_diff}d): Found image with {cloud_cover:.1f}% cloud cover")
@@ -161,6 +207,93 @@ class NDVIService:
 
         raise Exception(f"No suitable image found within ±{max_search_days} days of {target_date.strftime('%Y-%m-%d')} with <{max_cloud_cover}% cloud cover")
 
+    def get_cloud_free_image_windowed(
+        self,
+        collection: ee.ImageCollection,
+        aoi: ee.Geometry,
+        target_date: date,
+        max_cloud_cover: int = 20,
+        max_search_days: int = 45
+    ) -> Tuple[ee.Image, date, float, int]:
+        """
+        Find the same scene as get_cloud_free_image_iterative with a single getInfo() call
+        Filters the whole ±max_search_days window once, pulls candidate dates and cloud covers
+        back together and applies the day-by-day preference rules on the client
+
+        Returns the image, its date, its cloud cover and the number of round trips saved
+        """
+        print(f"  Searching for cloud-free image in one query (max cloud cover: {max_cloud_cover}%, search range: ±{max_search_days} days)")
+
+        start_str = (target_date - timedelta(days=max_search_days)).strftime('%Y-%m-%d')
+        end_str = (target_date + timedelta(days=max_search_days + 1)).strftime('%Y-%m-%d')
+
+        candidates = collection.filterBounds(aoi) \
+                               .filterDate(start_str, end_str) \
+                               .filter(ee.Filter.lt('CLOUD_COVER', max_cloud_cover))
+
+        candidate_info = self._get_info(ee.Dictionary({
+            'times': candidates.aggregate_array('system:time_start'),
+            'clouds': candidates.aggregate_array('CLOUD_COVER')
+        }), 'scene_candidates')
+
+        # Lowest cloud cover (and its timestamp) for each acquisition day
+        best_per_day = {}
+        for time_start, cloud_cover in zip(candidate_info['times'], candidate_info['clouds']):
+            day = datetime.utcfromtimestamp(time_start / 1000).date()
+            if day not in best_per_day or cloud_cover < best_per_day[day][1]:
+                best_per_day[day] = (time_start, cloud_cover)
+
+        # Visit days in the same order as the iterative search: target, -1, +1, -2, +2, ...
+        dates_to_try = [target_date]
+        for offset in range(1, max_search_days + 1):
+            dates_to_try.append(target_date - timedelta(days=offset))
+            dates_to_try.append(target_date + timedelta(days=offset))
+
+        best_date = None
+        best_cloud_cover = 100
+        best_time_start = None
+        iterative_round_trips = 0
+        images_found = 0
+
+        for search_date in dates_to_try:
+            # The iterative search pays one size() call per day and one CLOUD_COVER call per hit
+            iterative_round_trips += 1
+            if search_date not in best_per_day:
+                continue
+
+            iterative_round_trips += 1
+            images_found += 1
+            time_start, cloud_cover = best_per_day[search_date]
+
+            if cloud_cover < best_cloud_cover:
+                best_date = search_date
+                best_cloud_cover = cloud_cover
+                best_time_start = time_start
+
+            # Accept very good quality immediately
+            if cloud_cover < 5:
+                break
+
+        if best_date is None:
+            raise Exception(f"No suitable image found within ±{max_search_days} days of {target_date.strftime('%Y-%m-%d')} with <{max_cloud_cover}% cloud cover")
+
+        # Rebuilt lazily on the server; no extra round trip until the image is used
+        image = candidates.filter(ee.Filter.eq('system:time_start', best_time_start)) \
+                          .sort('CLOUD_COVER') \
+                          .first()
+
+        round_trips_saved = iterative_round_trips - 1
+        days_diff = abs((best_date - target_date).days)
+        print(f"  ✓ Selected {best_date.strftime('%Y-%m-%d')} (±{days_diff}d, {best_cloud_cover:.1f}% clouds, "
+              f"{len(best_per_day)} candidate days, {round_trips_saved} round trips saved)")
+
+        return image, best_date, best_cloud_cover, round_trips_saved
+
+    def _get_info(self, ee_object: Any, call: str) -> Any:
+        """Blocking getInfo() round trip, counted per call site for /metrics"""
+        EE_GETINFO_CALLS.labels(call=call).inc()
+        return ee_object.getInfo()
+
     def mask_clouds_landsat89(self, image: ee.Image) -> ee.Image:
         """Mask clouds for Landsat 8-9 using QA_PIXEL band"""
         qa = image.select('QA_PIXEL')
@@ -193,33 +326,381 @@ class NDVIService:
             scale=30,  # Landsat resolution
             maxPixels=1e9
         )
-        return stats.getInfo()
+        return self._get_info(stats, 'ndvi_stats')
 
     def get_ndvi_as_array(self, ndvi_image: ee.Image, aoi: ee.Geometry) -> np.ndarray:
         """Get NDVI as numpy array"""
         region = aoi.bounds()
         sample = ndvi_image.sampleRectangle(region=region, defaultValue=0)
-        ndvi_array = np.array(sample.get('NDVI').getInfo())
+        ndvi_array = np.array(self._get_info(sample.get('NDVI'), 'ndvi_array'), dtype=np.float32)
         return ndvi_array
 
-    async def fetch_ndvi_imagery(
+    def get_stacked_ndvi(
         self,
-        polygon_coords: List[List[float]],
-        years: int = 5
+        ndvi_images: Dict[int, ee.Image],
+        aoi: ee.Geometry
+    ) -> Tuple[np.ndarray, Dict[int, Dict[str, float]]]:
+        """
+        Fetch every year's NDVI array and statistics in a single getInfo() call
+        The per-year images are combined into one multi-band image (NDVI_2024, NDVI_2023, ...)
+        sampled with one sampleRectangle and reduced with one combined reduceRegion
+
+        Returns the (years, height, width) stack in the order of ndvi_images and per-year stats
+        keyed like get_ndvi_stats (NDVI_mean, NDVI_min, ...)
+        """
+        years = list(ndvi_images.keys())
+        stacked_image, band_names = self._stack_years(ndvi_images)
+
+        region = aoi.bounds()
+        sample = stacked_image.sampleRectangle(region=region, defaultValue=0)
+
+        stacked_info = self._get_info(ee.Dictionary({
+            'arrays': sample.toDictionary(band_names),
+            'stats': self._stacked_stats(stacked_image, aoi)
+        }), 'stacked_ndvi')
+
+        ndvi_stack = np.stack([
+            np.array(stacked_info['arrays'][band_name], dtype=np.float32)
+            for band_name in band_names
+        ])
+
+        return ndvi_stack, self._split_yearly_stats(stacked_info['stats'], years, band_names)
+
+    def get_ndvi_tile(
+        self,
+        stacked_image: ee.Image,
+        band_names: List[str],
+        grid: Dict[str, float],
+        row: int,
+        col: int,
+        height: int,
+        width: int
+    ) -> np.ndarray:
+        """
+        Fetch one tile of a multi-band NDVI image on the field's pixel grid (see _pixel_grid)
+        Uses computePixels with an explicit affine transform so neighbouring tiles line up exactly
+        Returns a (bands, height, width) float32 array
+        """
+        EE_GETINFO_CALLS.labels(call='ndvi_tile').inc()
+        tile = ee.data.computePixels({
+            'expression': stacked_image,
+            'fileFormat': 'NUMPY_NDARRAY',
+            'bandIds': band_names,
+            'grid': {
+                'dimensions': {'width': width, 'height': height},
+                'affineTransform': {
+                    'scaleX': grid['dx'],
+                    'shearX': 0,
+                    'translateX': grid['min_lng'] + col * grid['dx'],
+                    'shearY': 0,
+                    'scaleY': -grid['dy'],
+                    'translateY': grid['max_lat'] - row * grid['dy']
+                },
+                'crsCode': 'EPSG:4326'
+            }
+        })
+        return np.stack([tile[band_name] for band_name in band_names]).astype(np.float32)
+
+    def _stack_years(self, ndvi_images: Dict[int, ee.Image]) -> Tuple[ee.Image, List[str]]:
+        """Combine per-year NDVI images into one image with an NDVI_<year> band per year"""
+        band_names = [f'NDVI_{year}' for year in ndvi_images]
+        stacked_image = ee.Image.cat([
+            ndvi_image.select('NDVI').rename(band_name)
+            for ndvi_image, band_name in zip(ndvi_images.values(), band_names)
+        ])
+        return stacked_image, band_names
+
+    def _stacked_stats(self, stacked_image: ee.Image, aoi: ee.Geometry) -> ee.Dictionary:
+        """Mean, min/max, std dev and quartiles of every band in one reduceRegion"""
+        return stacked_image.reduceRegion(
+            reducer=ee.Reducer.mean().combine(
+                reducer2=ee.Reducer.minMax(),
+                sharedInputs=True
+            ).combine(
+                reducer2=ee.Reducer.stdDev(),
+                sharedInputs=True
+            ).combine(
+                reducer2=ee.Reducer.percentile([25, 50, 75]),
+                sharedInputs=True
+            ),
+            geometry=aoi,
+            scale=30,  # Landsat resolution
+            maxPixels=1e9
+        )
+
+    def _split_yearly_stats(
+        self,
+        stats: Dict[str, float],
+        years: List[int],
+        band_names: List[str]
+    ) -> Dict[int, Dict[str, float]]:
+        """Split NDVI_2024_mean -> {2024: {'NDVI_mean': ...}} to match get_ndvi_stats"""
+        yearly_stats = {year: {} for year in years}
+        for key, value in stats.items():
+            for year, band_name in zip(years, band_names):
+                if key.startswith(f'{band_name}_'):
+                    yearly_stats[year]['NDVI' + key[len(band_name):]] = value
+                    break
+        return yearly_stats
+
+    def _pixel_grid(self, polygon_coords: List[List[float]]) -> Dict[str, float]:
+        """
+        Pixel grid (about PIXEL_SIZE_METERS square, in degrees) covering the polygon's bounds
+        Returns the top-left corner, the pixel size and the grid dimensions
+        """
+        lngs = [point[0] for point in polygon_coords]
+        lats = [point[1] for point in polygon_coords]
+        mid_lat = math.radians((min(lats) + max(lats)) / 2)
+
+        dx = self.PIXEL_SIZE_METERS / (111320 * max(math.cos(mid_lat), 0.01))
+        dy = self.PIXEL_SIZE_METERS / 110540
+
+        return {
+            'min_lng': min(lngs),
+            'max_lat': max(lats),
+            'dx': dx,
+            'dy': dy,
+            'width': max(1, math.ceil((max(lngs) - min(lngs)) / dx)),
+            'height': max(1, math.ceil((max(lats) - min(lats)) / dy))
+        }
+
+    def _needs_tiling(self, polygon_coords: Optional[List[List[float]]]) -> bool:
+        """Whether the field has more pixels than one sampleRectangle request allows"""
+        if self.fetch_mode == 'tiled':
+            return True
+        if not polygon_coords:
+            return False
+        grid = self._pixel_grid(polygon_coords)
+        return grid['width'] * grid['height'] > self.SAMPLE_RECTANGLE_MAX_PIXELS
+
+    def _select_year_scene(
+        self,
+        landsat: ee.ImageCollection,
+        aoi: ee.Geometry,
+        target_year: int,
+        base_date: date
     ) -> Dict[str, Any]:
+        """Pick the cloud-free scene for a single year and build its clipped NDVI image"""
+        target_date = date(target_year, base_date.month, base_date.day)
+
+        print(f"\n[{target_year}] Processing year (target date: {target_date})")
+
+        # Get cloud-free image for this year with 20% max cloud cover
+        # Will search up to 45 days in each direction
+        round_trips_saved = 0
+        with PIPELINE_STAGE_SECONDS.labels(stage='scene_search').time():
+            if self.scene_selection == 'window':
+                image, actual_date, cloud_cover, round_trips_saved = self.get_cloud_free_image_windowed(
+                    landsat, aoi, target_date,
+                    max_cloud_cover=self.MAX_CLOUD_COVER, max_search_days=self.MAX_SEARCH_DAYS
+                )
+            else:
+                image, actual_date, cloud_cover = self.get_cloud_free_image_iterative(
+                    landsat, aoi, target_date,
+                    max_cloud_cover=self.MAX_CLOUD_COVER, max_search_days=self.MAX_SEARCH_DAYS
+                )
+
+        # Mask clouds and calculate NDVI
+        image_masked = self.mask_clouds_landsat89(image)
+        image_ndvi = self.add_ndvi_landsat89(image_masked)
+
+        # Clip to AOI
+        ndvi_clipped = image_ndvi.select('NDVI').clip(aoi)
+
+        return {
+            'year': target_year,
+            'ndvi_image': ndvi_clipped,
+            'metadata': {
+                'year': target_year,
+                'target_date': target_date.strftime('%Y-%m-%d'),
+                'actual_date': actual_date.strftime('%Y-%m-%d'),
+                'cloud_cover': cloud_cover,
+                'date_difference': abs((actual_date - target_date).days),
+                'scene_search_round_trips_saved': round_trips_saved
+            }
+        }
+
+    def _download_year(self, result: Dict[str, Any], aoi: ee.Geometry) -> Dict[str, Any]:
+        """Fetch statistics and the NDVI array for one selected scene"""
+        with PIPELINE_STAGE_SECONDS.labels(stage='ndvi_download').time():
+            # Get statistics
+            result['stats'] = self.get_ndvi_stats(result['ndvi_image'], aoi)
+
+            # Get as array
+            result['ndvi_array'] = self.get_ndvi_as_array(result['ndvi_image'], aoi)
+
+        self._print_year_summary(result)
+        self._store_in_cache(result)
+        return result
+
+    def _print_year_summary(self, result: Dict[str, Any]):
+        ndvi_array = result['ndvi_array']
+        print(f"✅ SUCCESS: Year {result['year']} complete!")
+        print(f"   NDVI range: [{np.nanmin(ndvi_array):.3f}, {np.nanmax(ndvi_array):.3f}]")
+        print(f"   NDVI mean: {np.nanmean(ndvi_array):.3f}")
+
+    def _fetch_year(
+        self,
+        landsat: ee.ImageCollection,
+        aoi: ee.Geometry,
+        target_year: int,
+        base_date: date,
+        download: bool = True,
+        cache_key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        Main method to fetch NDVI imagery for specified years
-        Returns NDVI arrays and metadata
+        Select the scene for a single year and, if download is set, fetch its statistics and array
+        Years found in the raster cache are returned without touching Earth Engine
+        Runs on a worker thread; returns None if no usable image was found
+        """
+        if self.cache is not None and cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"\n[{target_year}] Loaded from NDVI cache")
+                return {
+                    'year': target_year,
+                    'ndvi_image': None,
+                    'ndvi_array': cached['ndvi_array'],
+                    'metadata': cached['metadata'],
+                    'stats': cached['stats'],
+                    'cache_key': cache_key,
+                    'from_cache': True
+                }
 
-        IMPORTANT: Only analyzes years from 2019 to present (past 5 years max)
+        try:
+            result = self._select_year_scene(landsat, aoi, target_year, base_date)
+            result['cache_key'] = cache_key
+            if download:
+                self._download_year(result, aoi)
+            return result
+
+        except Exception as e:
+            print(f"❌ FAILED: Could not get image for {target_year}")
+            print(f"   Error: {str(e)}")
+            print(f"   Skipping to next year...")
+            return None
+
+    def _download_stacked(self, results: List[Dict[str, Any]], aoi: ee.Geometry):
+        """Fill in stats and arrays for all selected years with one stacked fetch"""
+        with PIPELINE_STAGE_SECONDS.labels(stage='ndvi_download').time():
+            ndvi_stack, yearly_stats = self.get_stacked_ndvi(
+                {result['year']: result['ndvi_image'] for result in results},
+                aoi
+            )
+
+        for result, ndvi_array in zip(results, ndvi_stack):
+            result['ndvi_array'] = ndvi_array
+            result['stats'] = yearly_stats[result['year']]
+            self._print_year_summary(result)
+            self._store_in_cache(result)
+
+    async def _download_tiled(
+        self,
+        results: List[Dict[str, Any]],
+        aoi: ee.Geometry,
+        polygon_coords: List[List[float]]
+    ):
         """
-        # Convert polygon coordinates to Earth Engine geometry
-        aoi = ee.Geometry.Polygon(polygon_coords)
+        Fill in stats and arrays for large fields tile by tile
+        Tiles are fetched concurrently (up to max_concurrent_years requests at a time) and
+        written into a memory-mapped (years, height, width) stack, so the download never holds
+        more than the in-flight tiles in memory
+        """
+        loop = asyncio.get_running_loop()
+        grid = self._pixel_grid(polygon_coords)
+        years = [result['year'] for result in results]
 
-        # Load Landsat collection
-        landsat = ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
-                    .merge(ee.ImageCollection('LANDSAT/LC09/C02/T1_L2'))
+        stacked_image, band_names = self._stack_years({result['year']: result['ndvi_image'] for result in results})
+        # Pixels outside the polygon or under clouds read as 0, like sampleRectangle's defaultValue
+        filled_image = stacked_image.unmask(0)
+
+        tiles = [
+            (row, col, min(self.TILE_SIZE, grid['height'] - row), min(self.TILE_SIZE, grid['width'] - col))
+            for row in range(0, grid['height'], self.TILE_SIZE)
+            for col in range(0, grid['width'], self.TILE_SIZE)
+        ]
+        print(
+            f"\nFetching {len(results)} years as {len(tiles)} tiles "
+            f"({grid['width']}x{grid['height']} pixels)..."
+        )
+
+        # Backed by a temporary file that is removed once the arrays are released; it is named
+        # so clustering workers can map it instead of receiving a pickled copy
+        with tempfile.NamedTemporaryFile(prefix='ndvi_tiles_', suffix='.dat', delete=False) as stack_file:
+            stack_path = stack_file.name
+        ndvi_stack = np.memmap(
+            stack_path,
+            dtype=np.float32,
+            mode='w+',
+            shape=(len(years), grid['height'], grid['width'])
+        )
+        weakref.finalize(ndvi_stack, os.remove, stack_path)
+
+        async def fetch_tile(row: int, col: int, height: int, width: int):
+            tile = await loop.run_in_executor(
+                self._executor, self.get_ndvi_tile,
+                filled_image, band_names, grid, row, col, height, width
+            )
+            ndvi_stack[:, row:row + height, col:col + width] = tile
+
+        with PIPELINE_STAGE_SECONDS.labels(stage='ndvi_download').time():
+            stats, _ = await asyncio.gather(
+                loop.run_in_executor(
+                    self._executor, self._get_info, self._stacked_stats(stacked_image, aoi), 'ndvi_stats'
+                ),
+                asyncio.gather(*[fetch_tile(*tile) for tile in tiles])
+            )
+
+        yearly_stats = self._split_yearly_stats(stats, years, band_names)
+        for result, ndvi_array in zip(results, ndvi_stack):
+            result['ndvi_array'] = ndvi_array
+            result['stats'] = yearly_stats[result['year']]
+            self._print_year_summary(result)
+            self._store_in_cache(result)
+
+    def _store_in_cache(self, result: Dict[str, Any]):
+        if self.cache is not None and result.get('cache_key') is not None:
+            self.cache.put(result['cache_key'], result['metadata'], result['stats'], result['ndvi_array'])
+
+    def _cache_key(
+        self,
+        polygon_coords: List[List[float]],
+        target_year: int,
+        base_date: date,
+        selection_bounds: Optional[List[float]] = None
+    ) -> Optional[str]:
+        """
+        Raster cache key for one year, or None when the year must not be cached
+        selection_bounds are the group bounds when the scene was selected for a batch group
+        Years whose scene search window has not closed yet are never cached: a newer
+        scene may still be acquired and would otherwise be hidden by the cached one
+        """
+        if self.cache is None:
+            return None
+        target_date = date(target_year, base_date.month, base_date.day)
+        if target_date + timedelta(days=self.MAX_SEARCH_DAYS) > date.today():
+            return None
+
+        # Tiled downloads use their own pixel grid instead of sampleRectangle's
+        pixel_grid = None
+        if self._needs_tiling(polygon_coords):
+            grid = self._pixel_grid(polygon_coords)
+            pixel_grid = {name: grid[name] for name in ('width', 'height', 'dx', 'dy')}
+
+        return self.cache.make_key(
+            polygon_coords, target_year, target_date.strftime('%Y-%m-%d'),
+            self.MAX_CLOUD_COVER, self.MAX_SEARCH_DAYS, pixel_grid, selection_bounds
+        )
+
+    def _load_landsat(self) -> ee.ImageCollection:
+        return ee.ImageCollection('LANDSAT/LC08/C02/T1_L2') \
+                 .merge(ee.ImageCollection('LANDSAT/LC09/C02/T1_L2'))
 
+    def _plan_years(self, years: int) -> Tuple[date, int, List[int]]:
+        """
+        Work out the base date, the number of years to fetch and the candidate years (newest first)
+        Extra candidate years are only used as fallbacks when a year has no usable imagery
+        """
         # Get base date (fixed seasonal date)
         base_date = self.get_growth_season_dates()
         print(f"\n{'='*70}")
@@ -241,80 +722,147 @@ class NDVIService:
         print(f"Will fetch data from {current_year} back to {max(current_year - years + 1, earliest_year)}")
         print(f"{'='*70}\n")
 
-        # Fetch images for past N years
-        ndvi_images = []
-        image_metadata = []
-        ndvi_arrays = []
-
-        years_processed = 0
-        year_offset = 0
         max_attempts = min(years + 3, available_years + 2)  # Allow some extra attempts
+        candidate_years = [
+            base_date.year - year_offset
+            for year_offset in range(max_attempts)
+            if base_date.year - year_offset >= earliest_year
+        ]
+
+        return base_date, years, candidate_years
 
-        # Process years sequentially (Earth Engine has rate limits)
+    async def _select_years(
+        self,
+        landsat: ee.ImageCollection,
+        aoi: ee.Geometry,
+        base_date: date,
+        years: int,
+        candidate_years: List[int],
+        download: bool,
+        polygon_coords: Optional[List[List[float]]] = None,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Select scenes for the requested number of years, newest first
+        Years are fetched concurrently; the executor size caps parallel Earth Engine requests
+        Returns (results, candidate years that were not tried)
+        """
+        loop = asyncio.get_running_loop()
         results = []
+        next_candidate = 0
 
-        while years_processed < years and year_offset < max_attempts:
-            target_year = base_date.year - year_offset
+        while len(results) < years and next_candidate < len(candidate_years):
+            batch = candidate_years[next_candidate:next_candidate + (years - len(results))]
+            next_candidate += len(batch)
 
-            # STOP if we go beyond 2019
-            if target_year < earliest_year:
-                print(f"\n⚠️  Reached earliest year limit (2019). Stopping.")
-                break
+            print(f"\nFetching years {batch} (up to {self.max_concurrent_years} at a time)")
+            year_futures = [
+                loop.run_in_executor(
+                    self._executor, self._fetch_year, landsat, aoi, target_year, base_date,
+                    download,
+                    self._cache_key(polygon_coords, target_year, base_date) if polygon_coords else None
+                )
+                for target_year in batch
+            ]
 
-            target_date = date(target_year, base_date.month, base_date.day)
+            # Failed years come back as None and are replaced by the next older year
+            for year_future in asyncio.as_completed(year_futures):
+                result = await year_future
+                if result is None:
+                    continue
+                results.append(result)
+                if progress is not None:
+                    progress('scene_selected', dict(result['metadata'], from_cache=result.get('from_cache', False)))
 
-            print(f"\n{'='*70}")
-            print(f"Processing Year {years_processed + 1}/{years}: {target_year}")
-            print(f"{'='*70}")
-            print(f"Target date: {target_date}")
+        # Reassemble in year order (newest first)
+        results.sort(key=lambda result: result['year'], reverse=True)
+        return results, candidate_years[next_candidate:]
 
-            try:
-                # Get cloud-free image for this year with 20% max cloud cover
-                # Will search up to 45 days in each direction
-                image, actual_date, cloud_cover = self.get_cloud_free_image_iterative(
-                    landsat, aoi, target_date, max_cloud_cover=20, max_search_days=45
-                )
+    async def _download_pending(
+        self,
+        results: List[Dict[str, Any]],
+        aoi: ee.Geometry,
+        polygon_coords: Optional[List[List[float]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Download arrays and stats for every selected year that does not have them yet
+        Returns the results that have their array; years whose download failed are dropped
+        """
+        loop = asyncio.get_running_loop()
 
-                # Mask clouds and calculate NDVI
-                image_masked = self.mask_clouds_landsat89(image)
-                image_ndvi = self.add_ndvi_landsat89(image_masked)
+        # Years loaded from the cache already have their array
+        pending_results = [result for result in results if 'ndvi_array' not in result]
+        if not pending_results:
+            return results
 
-                # Clip to AOI
-                ndvi_clipped = image_ndvi.select('NDVI').clip(aoi)
+        if polygon_coords and self._needs_tiling(polygon_coords):
+            try:
+                await self._download_tiled(pending_results, aoi, polygon_coords)
+            except Exception as e:
+                # Retry year by year so one bad year (or tile) only costs that year
+                print(f"⚠️ Tiled fetch failed ({str(e)}), fetching years one by one...")
+                downloads = [self._download_tiled([result], aoi, polygon_coords) for result in pending_results]
+                await self._gather_downloads(pending_results, downloads)
+            return [result for result in results if 'ndvi_array' in result]
 
-                # Get statistics
-                stats = self.get_ndvi_stats(ndvi_clipped, aoi)
+        if self.fetch_mode == 'stacked':
+            print(f"\nFetching {len(pending_results)} years as one stacked image...")
+            try:
+                await loop.run_in_executor(self._executor, self._download_stacked, pending_results, aoi)
+                return results
+            except Exception as e:
+                # e.g. a single band fits the sampleRectangle limit but the stack does not
+                print(f"⚠️ Stacked fetch failed ({str(e)}), fetching years one by one...")
 
-                # Get as array
-                ndvi_array = self.get_ndvi_as_array(ndvi_clipped, aoi)
+        downloads = [
+            loop.run_in_executor(self._executor, self._download_year, result, aoi)
+            for result in pending_results
+        ]
+        await self._gather_downloads(pending_results, downloads)
+        return [result for result in results if 'ndvi_array' in result]
 
-                print(f"✅ SUCCESS: Year {target_year} complete!")
-                print(f"   NDVI range: [{np.nanmin(ndvi_array):.3f}, {np.nanmax(ndvi_array):.3f}]")
-                print(f"   NDVI mean: {np.nanmean(ndvi_array):.3f}")
+    async def _gather_downloads(self, pending_results: List[Dict[str, Any]], downloads: List[Any]):
+        """Wait for per-year downloads, logging the years that failed instead of raising"""
+        outcomes = await asyncio.gather(*downloads, return_exceptions=True)
+        for result, outcome in zip(pending_results, outcomes):
+            if isinstance(outcome, Exception):
+                # A partial download may have set stats without an array
+                result.pop('ndvi_array', None)
+                print(f"❌ FAILED: Could not download imagery for {result['year']}")
+                print(f"   Error: {str(outcome)}")
+                print(f"   Skipping to next year...")
 
-                result = {
-                    'year': target_year,
-                    'ndvi_image': ndvi_clipped,
-                    'ndvi_array': ndvi_array,
-                    'metadata': {
-                        'year': target_year,
-                        'target_date': target_date.strftime('%Y-%m-%d'),
-                        'actual_date': actual_date.strftime('%Y-%m-%d'),
-                        'cloud_cover': cloud_cover,
-                        'date_difference': abs((actual_date - target_date).days)
-                    },
-                    'stats': stats
-                }
+    async def _download_with_fallback(
+        self,
+        results: List[Dict[str, Any]],
+        landsat: ee.ImageCollection,
+        aoi: ee.Geometry,
+        base_date: date,
+        years: int,
+        remaining_years: List[int],
+        polygon_coords: Optional[List[List[float]]] = None,
+        progress: Optional[Callable[..., None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Download the selected years, replacing years that fail with older candidate years
+        (like a year without usable imagery during scene selection)
+        Returns the downloaded results newest first; may hold fewer than years results
+        """
+        results = await self._download_pending(results, aoi, polygon_coords)
 
-                results.append(result)
-                years_processed += 1
+        while len(results) < years and remaining_years:
+            extra_results, remaining_years = await self._select_years(
+                landsat, aoi, base_date, years - len(results), remaining_years,
+                download=False, polygon_coords=polygon_coords, progress=progress
+            )
+            results += await self._download_pending(extra_results, aoi, polygon_coords)
 
-            except Exception as e:
-                print(f"❌ FAILED: Could not get image for {target_year}")
-                print(f"   Error: {str(e)}")
-                print(f"   Skipping to next year...")
+        results.sort(key=lambda result: result['year'], reverse=True)
+        return results
 
-            year_offset += 1
+    def _summarize(self, results: List[Dict[str, Any]], years: int) -> Dict[str, Any]:
+        """Build the fetch_ndvi_imagery return value from the per-year results"""
+        years_processed = len(results)
 
         if years_processed < years:
             if years_processed == 0:
@@ -324,9 +872,8 @@ class NDVIService:
                 print(f"   Continuing with available data...")
 
         # Extract data from results
-        for result in results:
-            ndvi_arrays.append(result['ndvi_array'])
-            image_metadata.append(result['metadata'])
+        ndvi_arrays = [result['ndvi_array'] for result in results]
+        image_metadata = [result['metadata'] for result in results]
 
         # Calculate aggregate statistics
         all_ndvi_means = [np.nanmean(arr) for arr in ndvi_arrays]
@@ -352,5 +899,157 @@ class NDVIService:
             'ndvi_arrays': ndvi_arrays,
             'metadata': image_metadata,
             'statistics': aggregate_stats,
+            # Years loaded from the raster cache instead of Earth Engine
+            'cached_years': [result['year'] for result in results if result.get('from_cache')],
             'analysis_date': datetime.now().isoformat()
         }
+
+    async def fetch_ndvi_imagery(
+        self,
+        polygon_coords: List[List[float]],
+        years: int = 5,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Main method to fetch NDVI imagery for specified years
+        Returns NDVI arrays and metadata
+
+        progress('scene_selected', metadata) is called on the event loop as each year's scene is chosen
+
+        IMPORTANT: Only analyzes years from 2019 to present (past 5 years max)
+        """
+        # Convert polygon coordinates to Earth Engine geometry
+        aoi = ee.Geometry.Polygon(polygon_coords)
+
+        # Load Landsat collection
+        landsat = self._load_landsat()
+
+        base_date, years, candidate_years = self._plan_years(years)
+
+        results, remaining_years = await self._select_years(
+            landsat, aoi, base_date, years, candidate_years,
+            # Fields over the sampleRectangle limit are downloaded in tiles by _download_pending
+            download=self.fetch_mode == 'per_year' and not self._needs_tiling(polygon_coords),
+            polygon_coords=polygon_coords,
+            progress=progress
+        )
+
+        results = await self._download_with_fallback(
+            results, landsat, aoi, base_date, years, remaining_years, polygon_coords, progress
+        )
+
+        return self._summarize(results, years)
+
+    def group_neighbouring_fields(
+        self,
+        fields_coords: List[List[List[float]]],
+        max_span_degrees: float = 0.1
+    ) -> List[List[int]]:
+        """
+        Group fields whose combined bounding box spans at most max_span_degrees (~11 km at 0.1)
+        so each group can share one Landsat scene search
+        Returns lists of indexes into fields_coords
+        """
+        bounds = []
+        for coords in fields_coords:
+            lngs = [point[0] for point in coords]
+            lats = [point[1] for point in coords]
+            bounds.append((min(lngs), min(lats), max(lngs), max(lats)))
+
+        # Greedy pass over fields sorted by position so neighbours end up next to each other
+        order = sorted(range(len(bounds)), key=lambda i: (round(bounds[i][1] / max_span_degrees), bounds[i][0]))
+
+        groups = []
+        group_bounds = []
+        for index in order:
+            min_lng, min_lat, max_lng, max_lat = bounds[index]
+            for group_index, (g_min_lng, g_min_lat, g_max_lng, g_max_lat) in enumerate(group_bounds):
+                union = (min(min_lng, g_min_lng), min(min_lat, g_min_lat), max(max_lng, g_max_lng), max(max_lat, g_max_lat))
+                if union[2] - union[0] <= max_span_degrees and union[3] - union[1] <= max_span_degrees:
+                    groups[group_index].append(index)
+                    group_bounds[group_index] = union
+                    break
+            else:
+                groups.append([index])
+                group_bounds.append(bounds[index])
+
+        return groups
+
+    async def fetch_ndvi_imagery_for_fields(
+        self,
+        fields_coords: List[List[List[float]]],
+        years: int = 5
+    ) -> List[Any]:
+        """
+        Fetch NDVI imagery for a group of neighbouring fields with one scene search per year
+        Scenes are selected once over the group's union bounds (only scenes covering the whole
+        union are considered) and each field then downloads its own clipped arrays
+        Falls back to fetch_ndvi_imagery per field when too few scenes cover the union
+
+        Returns one fetch_ndvi_imagery-style dict per field, or the Exception for fields that failed
+        """
+        if len(fields_coords) == 1:
+            try:
+                return [await self.fetch_ndvi_imagery(fields_coords[0], years=years)]
+            except Exception as e:
+                return [e]
+
+        lngs = [point[0] for coords in fields_coords for point in coords]
+        lats = [point[1] for coords in fields_coords for point in coords]
+        union_bounds = [min(lngs), min(lats), max(lngs), max(lats)]
+        union_aoi = ee.Geometry.Rectangle(union_bounds)
+
+        print(f"\nSelecting scenes once for {len(fields_coords)} neighbouring fields")
+        landsat = self._load_landsat().filter(ee.Filter.contains(leftField='.geo', rightValue=union_aoi))
+
+        base_date, years, candidate_years = self._plan_years(years)
+
+        group_results, remaining_years = await self._select_years(
+            landsat, union_aoi, base_date, years, candidate_years, download=False
+        )
+
+        if len(group_results) < years:
+            # Union bounds straddle a path/row edge, so few scenes cover the whole group
+            print(f"⚠️ Only {len(group_results)} group scenes found, fetching fields individually")
+            return await asyncio.gather(
+                *[self.fetch_ndvi_imagery(coords, years=years) for coords in fields_coords],
+                return_exceptions=True
+            )
+
+        async def fetch_field(coords: List[List[float]]) -> Dict[str, Any]:
+            aoi = ee.Geometry.Polygon(coords)
+            results = []
+            for group_result in group_results:
+                year = group_result['year']
+                # Keyed by the group bounds: a search over the field alone may pick another scene
+                cache_key = self._cache_key(coords, year, base_date, union_bounds)
+                cached = self.cache.get(cache_key) if cache_key else None
+
+                if cached is not None:
+                    results.append({
+                        'year': year,
+                        'ndvi_image': None,
+                        'ndvi_array': cached['ndvi_array'],
+                        'metadata': cached['metadata'],
+                        'stats': cached['stats'],
+                        'cache_key': cache_key,
+                        'from_cache': True
+                    })
+                else:
+                    results.append({
+                        'year': year,
+                        'ndvi_image': group_result['ndvi_image'].clip(aoi),
+                        'metadata': dict(group_result['metadata']),
+                        'cache_key': cache_key
+                    })
+
+            # Years that fail for this field are replaced by a search over the field alone
+            results = await self._download_with_fallback(
+                results, self._load_landsat(), aoi, base_date, years, remaining_years, coords
+            )
+            return self._summarize(results, years)
+
+        return await asyncio.gather(
+            *[fetch_field(coords) for coords in fields_coords],
+            return_exceptions=True
+        )
@@ -3,7 +3,7 @@ import time
 from images import get_stacked_imgs
 from sklearn.cluster import AffinityPropagation
 from sklearn.preprocessing import StandardScaler
-import pickle
+import hashlib
 import json
 import os
 
@@ -12,6 +12,78 @@ import os
 #     params_json = json.load(f)
 #     DATASET_NAME = f'{params_json.get('DATASET_NAME')}.pkl'
 
+LABEL_CACHE_DIR = 'label_data'
+LABEL_CACHE_VERSION = 1          # bump when the clustering steps change, older entries are then ignored
+LABEL_CACHE_MAX_MB = 512         # oldest entries are evicted above this
+
+
+def label_cache_key(pixels, damping, preference):
+    """ hash of the pixel matrix and the clustering params, so changed images or params never hit a stale entry """
+
+    pixels = np.ascontiguousarray(pixels)
+
+    h = hashlib.sha256()
+    h.update(f"v{LABEL_CACHE_VERSION}|{pixels.dtype.str}|{pixels.shape}|{damping}|{preference}".encode())
+    h.update(pixels.data)
+    return h.hexdigest()[:24]
+
+
+def load_cached_labels(cache_key):
+    """ returns (labels, metadata) from the label cache, labels are memory-mapped, or None when not cached """
+
+    labels_path = os.path.join(LABEL_CACHE_DIR, f'{cache_key}.npy')
+    meta_path = os.path.join(LABEL_CACHE_DIR, f'{cache_key}.json')
+
+    if not (os.path.exists(labels_path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path) as f:
+        metadata = json.load(f)
+    if metadata.get('version') != LABEL_CACHE_VERSION:
+        return None
+
+    labels = np.load(labels_path, mmap_mode='r')
+    os.utime(labels_path)    # recently used entries are evicted last
+    return labels, metadata
+
+
+def save_cached_labels(cache_key, labels, metadata):
+    """ stores labels as int16 .npy (int32 if there are too many clusters) and the fit metadata as json """
+
+    os.makedirs(LABEL_CACHE_DIR, exist_ok=True)
+
+    dtype = np.int16 if len(labels) == 0 or labels.max() <= np.iinfo(np.int16).max else np.int32
+    np.save(os.path.join(LABEL_CACHE_DIR, f'{cache_key}.npy'), labels.astype(dtype))
+    with open(os.path.join(LABEL_CACHE_DIR, f'{cache_key}.json'), 'w') as f:
+        json.dump({**metadata, 'version': LABEL_CACHE_VERSION}, f, indent=2)
+
+    evict_label_cache(keep=cache_key)
+
+
+def evict_label_cache(keep=None):
+    """ removes least recently used entries until the cache fits in LABEL_CACHE_MAX_MB """
+
+    entries = []
+    for name in os.listdir(LABEL_CACHE_DIR):
+        if not name.endswith('.npy'):
+            continue
+        key = name[:-4]
+        paths = [os.path.join(LABEL_CACHE_DIR, f'{key}{ext}') for ext in ('.npy', '.json')]
+        size = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+        entries.append((os.path.getmtime(paths[0]), key, size, paths))
+
+    total = sum(size for _, _, size, _ in entries)
+    for _, key, size, paths in sorted(entries):
+        if total <= LABEL_CACHE_MAX_MB * 1024 * 1024:
+            break
+        if key == keep:
+            continue
+        for p in paths:
+            if os.path.exists(p):
+                os.remove(p)
+        total -= size
+        print(f'label cache entry {key} evicted')
+
 
 def Affinity_Propagation(
         dataset_name : str, 
@@ -34,14 +106,13 @@ def Affinity_Propagation(
                                                                                         outlier_type=outlier_type
                                                                                     )
 
-    saveload_path = f"labels_{outlier_type}_{dataset_name}.pkl"
+    cache_key = label_cache_key(pixels_with_no_None, damping, preference)
 
     # load data of labels
-    if saveload_path in os.listdir('label_data'):
-        with open(f'label_data/{saveload_path}','rb') as f:
-            labels = pickle.load(f)
-            labels = labels.labels_
-        print(f'labels data loaded from label_data/{saveload_path}\n')
+    cached = load_cached_labels(cache_key)
+    if cached is not None:
+        labels, _ = cached
+        print(f'labels data loaded from {LABEL_CACHE_DIR}/{cache_key}.npy\n')
 
     else:
         # save data of labels
@@ -55,13 +126,24 @@ def Affinity_Propagation(
                                )
         affinity_propagation.fit(data_normalized)
 
-        print(f"Time taken for clustering - {time.time()-st} seconds\n")
+        fit_seconds = time.time() - st
+        print(f"Time taken for clustering - {fit_seconds} seconds\n")
 
         labels = affinity_propagation.labels_
 
-        with open(f'label_data/{saveload_path}','wb') as f:
-            pickle.dump(affinity_propagation,f)
-            print(f'labels data saved in label_data/{saveload_path}\n')
+        save_cached_labels(cache_key, labels, {
+            'dataset_name': dataset_name,
+            'outlier_type': outlier_type,
+            'damping': damping,
+            'preference': preference,
+            'pixels_shape': list(pixels_with_no_None.shape),
+            'num_clusters': int(len(affinity_propagation.cluster_centers_indices_)),
+            'exemplar_indices': [int(i) for i in affinity_propagation.cluster_centers_indices_],
+            'n_iter': int(affinity_propagation.n_iter_),
+            'fit_seconds': round(fit_seconds, 3),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        })
+        print(f'labels data saved in {LABEL_CACHE_DIR}/{cache_key}.npy\n')
             
     print(f"Total num of cluster - {np.max(labels)+1}")
     return labels, future_req_array, shape_to_reshape, pixels_with_no_None, Nan_posn, vals_in_None
@@ -89,7 +171,8 @@ cool_map2 = ListedColormap(coolors2)
 cool_map3 = ListedColormap(coolors3)
 cool_map4 = ListedColormap(coolors4)
 
-import cv2
+import tifffile
+import tempfile
 import numpy as np
 import json
 
@@ -104,78 +187,98 @@ with open('dataset_paths.json') as f:
 # DATASET_NAME = params_json.get('DATASET_NAME')            # 'ndvi', 'savi', 'msavi' (along with field no's)                            
 
 
+def _open_raster(path : str):
+    """ memory-maps a raster when its pixel data is stored uncompressed, otherwise reads it """
+    try:
+        return tifffile.memmap(path, mode='r')
+    except ValueError:
+        # compressed / tiled tiffs can't be memory-mapped
+        return tifffile.imread(path)
+
+
+# loading images
+def load_stack(paths : list):
+    """ reads any number of single band rasters into one (n_years, height, width) float32 stack, normalized by 10000
+
+    the stack is a memory-mapped temporary file, so a large multi-field dataset is never held in RAM twice
+    float32 instead of the old float64 images, so outputs are close to but not bit-identical with earlier runs
+    (line-plot values move by ~1e-9; maps, confusion matrices and thresholds are unchanged)
+    """
+
+    first = _open_raster(paths[0])
+    stack = np.memmap(tempfile.TemporaryFile(), dtype=np.float32, mode='w+', shape=(len(paths), *first.shape))
+
+    for year, path in enumerate(paths):
+        img = first if year == 0 else _open_raster(path)
+        if img.shape != first.shape:
+            raise ValueError(f"{path} has shape {img.shape}, expected {first.shape}")
+        np.divide(img, 10000, out=stack[year], dtype=np.float32, casting='unsafe')
+        del img
+
+    return stack
+
+
 # loading and preprocessing images
-def open_normlz_and_remove_outliers_4_imgs(
+def open_normlz_and_remove_outliers(
         dataset_name : str, 
         outlier_type : str
     ):
-    
-    paths = paths_global.get(dataset_name)
-    pth1, pth2, pth3, pth4, pth5 = paths[0], paths[1], paths[2], paths[3], paths[4]
+    """ loads the dataset stack and finds the pixels to drop
 
-    img1 = cv2.imread(pth1,cv2.IMREAD_UNCHANGED)
-    img2 = cv2.imread(pth2,cv2.IMREAD_UNCHANGED)
-    img3 = cv2.imread(pth3,cv2.IMREAD_UNCHANGED)
-    img4 = cv2.imread(pth4,cv2.IMREAD_UNCHANGED)
-    img5 = cv2.imread(pth5,cv2.IMREAD_UNCHANGED)    
+    returns:
+    stack is the (n_years, height, width) float32 stack
+    pos_to_make_None is the (rows, cols) of the bg pixels and / or outliers, depending on outlier_type
+    """
 
-    img1 = img1 / 10000
-    img2 = img2 / 10000
-    img3 = img3 / 10000
-    img4 = img4 / 10000
-    img5 = img5 / 10000
+    stack = load_stack(paths_global.get(dataset_name))
 
     #MEAN +/- 1.96*SD
 
-    minn = np.min(img1)
-
-    pos_to_make_None = np.where(img1 == minn)   #-3.26 will be removed... In 2020, there is a negative value, -0.144, but that isnt made 0, here  (for ndvi field 2)
-    print(f"Bg None pixels -> {pos_to_make_None[0].shape}")
-
-    mask = np.ones(img1.shape, dtype=bool)
+    bg = stack[0] == stack[0].min()   #-3.26 will be removed... In 2020, there is a negative value, -0.144, but that isnt made 0, here  (for ndvi field 2)
+    print(f"Bg None pixels -> {np.count_nonzero(bg)}")
 
-    mask[pos_to_make_None] = False
+    # one year at a time, so only a single year's foreground pixels are copied out of the memmap
+    Q1, Q3 = np.array([np.nanpercentile(year[~bg], [25, 75]) for year in stack]).T
 
-    img1_Q1 = np.nanpercentile(img1[mask], 25)
-    img2_Q1 = np.nanpercentile(img2[mask], 25)
-    img3_Q1 = np.nanpercentile(img3[mask], 25)
-    img4_Q1 = np.nanpercentile(img4[mask], 25)
-    img5_Q1 = np.nanpercentile(img5[mask], 25)
-
-    img1_Q3 = np.nanpercentile(img1[mask], 75)
-    img2_Q3 = np.nanpercentile(img2[mask], 75)
-    img3_Q3 = np.nanpercentile(img3[mask], 75)
-    img4_Q3 = np.nanpercentile(img4[mask], 75)
-    img5_Q3 = np.nanpercentile(img5[mask], 75)
-
-    Q1_avg = (img1_Q1 + img2_Q1 + img3_Q1 + img4_Q1 + img5_Q1) / 5
-    Q3_avg = (img1_Q3 + img2_Q3 + img3_Q3 + img4_Q3 + img5_Q3) / 5
+    Q1_avg = Q1.mean()
+    Q3_avg = Q3.mean()
 
     outlier_range_min = Q1_avg - 1.5 * (Q3_avg - Q1_avg)
     outlier_range_max = Q3_avg + 1.5 * (Q3_avg - Q1_avg)
 
-    mean_of_eachpix_in_Img = (img1 + img2 + img3 + img4 + img5) / 5
+    mean_of_eachpix_in_Img = stack.mean(axis=0)
 
     print(f" outlier -> {outlier_type}")
 
     # ❌❌❌ OUTLIER CONDN Part
 
     if outlier_type == 'hl':
-        pos_to_make_None = np.where((mean_of_eachpix_in_Img < outlier_range_min) | (mean_of_eachpix_in_Img > outlier_range_max))  # | (mean_of_eachpix_in_Img > outlier_range_max)... for only outlier_max, also hav to include the -3.26 coords
+        to_make_None = (mean_of_eachpix_in_Img < outlier_range_min) | (mean_of_eachpix_in_Img > outlier_range_max)  # | (mean_of_eachpix_in_Img > outlier_range_max)... for only outlier_max, also hav to include the -3.26 coords
     
     elif outlier_type == 'l':
-        pos_to_make_None = np.where((mean_of_eachpix_in_Img < outlier_range_min))
+        to_make_None = mean_of_eachpix_in_Img < outlier_range_min
     
     elif outlier_type == 'h':
-        pos_to_make_None1 = np.where((mean_of_eachpix_in_Img > outlier_range_max))
-        pos_to_make_None = np.concatenate((pos_to_make_None[0], pos_to_make_None1[0]),axis=0),np.concatenate((pos_to_make_None[1], pos_to_make_None1[1]),axis=0)   #❌only for outlier_max
+        to_make_None = bg | (mean_of_eachpix_in_Img > outlier_range_max)   #❌only for outlier_max
     else:
         # condition where no outliers are removed (Except the bg pixels)
-        pass
+        to_make_None = bg
+
+    pos_to_make_None = np.nonzero(to_make_None)
 
-    print(f"Outliers -> {pos_to_make_None[0].shape},\nTotal Pixels -> {mean_of_eachpix_in_Img.shape[0] * mean_of_eachpix_in_Img.shape[1]}")
+    print(f"Outliers -> {pos_to_make_None[0].shape},\nTotal Pixels -> {mean_of_eachpix_in_Img.size}")
+
+    return stack, pos_to_make_None
+
+
+def open_normlz_and_remove_outliers_4_imgs(
+        dataset_name : str, 
+        outlier_type : str
+    ):
+    """ per year images followed by pos_to_make_None, kept for older notebooks """
 
-    return img1, img2, img3, img4, img5, pos_to_make_None
+    stack, pos_to_make_None = open_normlz_and_remove_outliers(dataset_name=dataset_name, outlier_type=outlier_type)
+    return (*stack, pos_to_make_None)
 
 
 # stack images and few other stuff
@@ -185,56 +288,31 @@ def get_stacked_imgs(
     ):
     """ opens images, stacks them, removes NAN values , returns pixels at Nan position, and returns one single vector """
 
-    img1, img2, img3, img4, img5, pos_to_make_None = open_normlz_and_remove_outliers_4_imgs(dataset_name=dataset_name, outlier_type=outlier_type)
+    stack, pos_to_make_None = open_normlz_and_remove_outliers(dataset_name=dataset_name, outlier_type=outlier_type)
 
-    future_req_array = np.ones_like(img1)
+    future_req_array = np.ones(stack.shape[1:], dtype=stack.dtype)
 
     future_req_array[pos_to_make_None]=0
 
-    vals_in_None = [
-        img1[pos_to_make_None], 
-        img2[pos_to_make_None], 
-        img3[pos_to_make_None], 
-        img4[pos_to_make_None], 
-        img5[pos_to_make_None]
-    ]
-    
-    img1[pos_to_make_None] = None
-    img2[pos_to_make_None] = None
-    img3[pos_to_make_None] = None
-    img4[pos_to_make_None] = None
-    img5[pos_to_make_None] = None
-
+    vals_in_None = list(stack[(slice(None), *pos_to_make_None)])
 
-    stacked_image = np.stack( [img1, img2, img3, img4, img5] )
-    vector_of_5_years = []
-    a = stacked_image.shape
-    
-    for i in range(a[1]):
-        for j in range(a[2]):
-            stack_list = []
-            for k in range(a[0]):
-                stack_list.append(stacked_image[k][i][j])
-            vector_of_5_years.append(stack_list[:])
+    stack[(slice(None), *pos_to_make_None)] = np.nan
 
-    stacked_image = np.array(vector_of_5_years)
+    # (n_pixels, n_years), one row per pixel in row-major order
+    stacked_image = stack.reshape(stack.shape[0], -1).T
 
-    pixels_with_no_None = []
+    pixels_with_no_None = np.ascontiguousarray(stacked_image[~np.isnan(stacked_image).all(axis=1)])
 
-    temp = ~np.isnan(stacked_image)
-    for i in range(temp.shape[0]):
-        if True in temp[i]:
-            pixels_with_no_None.append(stacked_image[i])
-    pixels_with_no_None = np.array(pixels_with_no_None)
-
-    return pixels_with_no_None, future_req_array, img1.shape, pos_to_make_None, vals_in_None
+    return pixels_with_no_None, future_req_array, stack.shape[1:], pos_to_make_None, vals_in_None
 
 from clustering import Affinity_Propagation
 from mapper_nd_utility_func import cluster_label_year_map, find_mean_var_nd_sort
 from mapper_nd_utility_func import map_new_labels_with_old, high_low_using_clustering, assign_classes_to_outliers
-from mapper_nd_utility_func import high_low_and_intermediate_without_clustering, LinePLot_X_Intermediate_map
+from mapper_nd_utility_func import high_low_and_intermediate_without_clustering, line_plot, intermediate_clustering_map
 from mapper_nd_utility_func import interested_cluster_plot, pix_count, confusion_matrix
+from concurrent.futures import ProcessPoolExecutor
 import pickle
+import os
 
 # import json
 # with open('params.json') as f:
@@ -243,36 +321,58 @@ import pickle
 #     interested_cluster = params.get('interested_cluster')
 
 
+def write_outputs(outputs : dict, max_workers : int = None):
+    """ runs the independent output writers {name: (func, kwargs)}, concurrently in a process pool 
+    (one process per output, up to the cpu count, by default), in this process when that is 1 worker
+
+    returns: {name: return value}
+    """
+
+    max_workers = max_workers or min(len(outputs), os.cpu_count() or 1)
+
+    if max_workers == 1:
+        return {name : func(**kwargs) for name, (func, kwargs) in outputs.items()}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name : pool.submit(func, **kwargs) for name, (func, kwargs) in outputs.items()}
+        return {name : future.result() for name, future in futures.items()}
+
+
 def main(
         dataset_name : str, 
         pics_path : str,
         stat_analyz : str = 'mean', 
         outlier_type : str = '', 
         interested_cluster : int | list = None,
-        include_outlier_pixels : bool = False
+        include_outlier_pixels : bool = False,
+        render_figures : bool = True,
+        max_workers : int = None
     ):
+    """
+    render_figures=False is the fast mode: no matplotlib figures, tables are written as csv / json 
+    (line_plot.csv, pixel_count.csv, *_table.csv / .json) next to the .tif maps.
+    with figures, the maps and plots are rendered concurrently in max_workers processes (1 renders them in this process)
+    """
 
     # os.makedirs(f'pics/{dataset_name}', exist_ok=True)
 
-    confusion_matrix_store = []
-
     labels, _, shape_to_reshape, pixels_with_no_None, nan_posn, vals_in_None = Affinity_Propagation(
                                                                                     dataset_name=dataset_name, 
                                                                                     outlier_type=outlier_type
                                                                                 )
     print('Clustering done\n')
 
-    cluster_lineplot, cluster_values, pixel_count_plot = cluster_label_year_map(
-                                                            labels=labels, 
-                                                            data=pixels_with_no_None
-                                                        )
+    cluster_stats = cluster_label_year_map(
+                        labels=labels, 
+                        data=pixels_with_no_None
+                    )
 
     indexes, high_low_pixels_based_on_avg_clusters, threshold = find_mean_var_nd_sort(
-                                                                    cluster_values=cluster_values
+                                                                    cluster_stats=cluster_stats
                                                                 )
 
     final_mapped_op,  inter_clust_val1, _, var_plot_4_each_pix, mapper_4_plotting = map_new_labels_with_old(
-                                                                                        cluster_lineplot=cluster_lineplot, 
+                                                                                        cluster_stats=cluster_stats, 
                                                                                         indexes=indexes, 
                                                                                         interested_cluster=interested_cluster, 
                                                                                         threshold=threshold, 
@@ -285,50 +385,65 @@ def main(
                                                                         include_outlier_pixels=include_outlier_pixels
                                                                     )
 
-    high_low_using_clustering(
-        high_low_pixel_vals=high_low_pixels_based_on_avg_clusters, 
-        labels=labels, 
-        shape_to_reshape=shape_to_reshape, 
-        nan_posn=nan_posn, 
-        vals_in_None=outlier_vals_for_2class_clust, 
-        pics_path=pics_path,
-        include_outlier_pixels=include_outlier_pixels
-    )
-
-    confusion_matrix_store = high_low_and_intermediate_without_clustering(
-                                data=pixels_with_no_None, 
-                                shape_to_reshape=shape_to_reshape, 
-                                nan_posn=nan_posn, 
-                                confusion_matrix_store=confusion_matrix_store, 
-                                vals_in_None=vals_in_None, 
-                                pics_path=pics_path,
-                                include_outlier_pixels=include_outlier_pixels
-                            )
-
-    confusion_matrix_store, line_plots_data = LinePLot_X_Intermediate_map(
-                                                stat_clust_vals=final_mapped_op, 
-                                                inter_clust_val1=inter_clust_val1, 
-                                                variance_plot=var_plot_4_each_pix, 
-                                                mapper_4_plotting=mapper_4_plotting, 
-                                                confusion_matrix_store=confusion_matrix_store,
-                                                labels=labels,
-                                                shape_to_reshape=shape_to_reshape,
-                                                stat_analyz=stat_analyz,
-                                                nan_posn=nan_posn,
-                                                threshold=threshold,
-                                                vals_in_None=outliers_vals_for_6class_clust,
-                                                pics_path=pics_path,
-                                                include_outlier_pixels=include_outlier_pixels
-                                            )
+    # the maps and plots only depend on the results above, so they are written independently
+    outputs = {
+        'high_low_clustering': (high_low_using_clustering, dict(
+            high_low_pixel_vals=high_low_pixels_based_on_avg_clusters, 
+            labels=labels, 
+            shape_to_reshape=shape_to_reshape, 
+            nan_posn=nan_posn, 
+            vals_in_None=outlier_vals_for_2class_clust, 
+            pics_path=pics_path,
+            include_outlier_pixels=include_outlier_pixels,
+            render_figures=render_figures
+        )),
+        'rule_based': (high_low_and_intermediate_without_clustering, dict(
+            data=pixels_with_no_None, 
+            shape_to_reshape=shape_to_reshape, 
+            nan_posn=nan_posn, 
+            confusion_matrix_store=[], 
+            vals_in_None=vals_in_None, 
+            pics_path=pics_path,
+            include_outlier_pixels=include_outlier_pixels,
+            render_figures=render_figures
+        )),
+        'intermediate_clustering': (intermediate_clustering_map, dict(
+            inter_clust_val1=inter_clust_val1, 
+            threshold=threshold,
+            mapper_4_plotting=mapper_4_plotting, 
+            confusion_matrix_store=[],
+            labels=labels,
+            shape_to_reshape=shape_to_reshape,
+            nan_posn=nan_posn,
+            vals_in_None=outliers_vals_for_6class_clust,
+            pics_path=pics_path,
+            num_classes=pixels_with_no_None.shape[1] + 1,
+            include_outlier_pixels=include_outlier_pixels,
+            render_figures=render_figures
+        )),
+        'line_plot': (line_plot, dict(
+            stat_clust_vals=final_mapped_op, 
+            threshold=threshold,
+            stat_analyz=stat_analyz,
+            pics_path=pics_path,
+            render_figures=render_figures
+        )),
+        'pixel_count': (pix_count, dict(
+            cluster_stats=cluster_stats,
+            mapper=mapper_4_plotting, 
+            pics_path=pics_path,
+            render_figures=render_figures
+        )),
+    }
 
     # if interested_cluster:
     #     interested_cluster_plot(mapper=mapper_4_plotting, labels=labels, shape_to_reshape=shape_to_reshape, nan_posn=nan_posn, interested_cluster=interested_cluster)  
 
-    pix_count(
-        pixel_count_plot=pixel_count_plot,
-        mapper=mapper_4_plotting, 
-        pics_path=pics_path
-    )
+    # without figures every output takes milliseconds, not worth starting processes
+    results = write_outputs(outputs, max_workers=max_workers if render_figures else 1)
+
+    confusion_matrix_store = results['rule_based'] + results['intermediate_clustering']   # rule based first, then clustering
+    line_plots_data = results['line_plot']
 
 
     data_for_plotting_interested_cluster = {
@@ -343,7 +458,8 @@ def main(
         pickle.dump(data_for_plotting_interested_cluster, f)
 
     return confusion_matrix(
-            confusion_matrix_store=confusion_matrix_store
+            confusion_matrix_store=confusion_matrix_store,
+            num_classes=pixels_with_no_None.shape[1] + 1
         ), line_plots_data, threshold
 
 
@@ -369,6 +485,13 @@ stat_analyz_type = {
         'median' : 2
     }
 
+STAT_FIELDS = ('mean', 'std', 'median')   # cluster_stats arrays, in stat_analyz_type order
+
+FIRST_YEAR = 2019
+
+PIXEL_AREA = 900                # m², 30m landsat pixel
+SQ_METERS_PER_ACRE = 4046.86
+
 
 def plot_image_boxplots(image_paths : list, title : str, name : str):
 
@@ -391,7 +514,7 @@ def plot_image_boxplots(image_paths : list, title : str, name : str):
 
         # Append the pixel values and corresponding labels
         pixel_values.extend(flat_pixels)
-        labels.extend([f"{idx+ 2019}"] * len(flat_pixels))
+        labels.extend([f"{idx + FIRST_YEAR}"] * len(flat_pixels))
 
     # Create a DataFrame for Seaborn compatibility
     data = pd.DataFrame({
@@ -416,151 +539,192 @@ def plot_image_boxplots(image_paths : list, title : str, name : str):
     plt.show()
 
 
+def group_by_cluster(labels, data, years=None):
+    """
+    per cluster, per year stats of the pixel matrix, the pixels are sorted by label once
+    and every stat is a segment reduction over the sorted rows (any number of years)
+
+    returns: dict with
+    clusters: (n_clusters,) cluster labels, ascending
+    inverse: (n_pixels,) row of each pixel's cluster in the arrays below
+    counts: (n_clusters,) pixel count of each cluster
+    mean, std, median: (n_clusters, n_years)
+    years: year names of the columns
+    """
+
+    labels = np.asarray(labels)
+    data = np.asarray(data, dtype=np.float64)
+    n_pixels, n_years = data.shape
+
+    order = np.argsort(labels, kind='stable')
+    sorted_labels = labels[order]
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_labels)) + 1))
+    counts = np.diff(np.append(starts, n_pixels))
+    clusters = sorted_labels[starts]
+
+    rows = np.repeat(np.arange(len(clusters)), counts)   # cluster row of each sorted pixel
+    inverse = np.empty(n_pixels, dtype=np.intp)
+    inverse[order] = rows
+
+    grouped = data[order]
+
+    mean = np.add.reduceat(grouped, starts, axis=0) / counts[:, None]
+    std = np.sqrt(np.add.reduceat((grouped - mean[rows]) ** 2, starts, axis=0) / counts[:, None])
+
+    median = np.empty_like(mean)
+    lower, upper = starts + (counts - 1) // 2, starts + counts // 2
+    for year in range(n_years):
+        vals = grouped[:, year]
+        vals = vals[np.lexsort((vals, rows))]    # sorted within each cluster
+        median[:, year] = (vals[lower] + vals[upper]) / 2
+    median[np.add.reduceat(np.isnan(grouped), starts, axis=0) > 0] = np.nan   # same as np.median
+
+    return {
+        'clusters': clusters,
+        'inverse': inverse,
+        'counts': counts,
+        'mean': mean,
+        'std': std,
+        'median': median,
+        'years': list(years) if years is not None else [str(FIRST_YEAR + i) for i in range(n_years)],
+    }
+
+
 def cluster_label_year_map(labels, data):
     """
-    seperates pix value based on its years and also counts number of pixels
+    groups the pix values of each cluster by year and counts number of pixels
     for each cluster (with incorrect labels, but its fixd in the pix_count func)  
 
-    returns: cluster_lineplot, cluster, pixel_count_plot
-    cluster_lineplot: {cluster_label: {year: [pixel_values]}}
-    cluster_values: {cluster_label: [pixel_values]}
-    pixel_count_plot: {cluster_label: pixel_count}
+    returns: cluster_stats from group_by_cluster
     """
-    
-    cluster_lineplot = {i:{'2019':[],'2020':[],'2021':[],'2022':[],'2023':[]} for i in set(labels)}
-    cluster_values = {i:[] for i in set(labels)}
-
-    for i,j in zip(labels,data):
-        cluster_lineplot[i]['2019'].append(j[0])
-        cluster_lineplot[i]['2020'].append(j[1])
-        cluster_lineplot[i]['2021'].append(j[2])
-        cluster_lineplot[i]['2022'].append(j[3])
-        cluster_lineplot[i]['2023'].append(j[4])
-        
-        cluster_values[i].append(j)
-
-    count = 0
-    pixel_count_plot = {i : 0 for i in cluster_values}
 
-    for i in cluster_values:
-        pixel_count_plot[i]  +=  len(cluster_values[i])
-        count += len(cluster_values[i])
+    cluster_stats = group_by_cluster(labels=labels, data=data)
 
-    print(f"Total pix - {count}")
+    print(f"Total pix - {cluster_stats['counts'].sum()}")
 
-    return cluster_lineplot, cluster_values, pixel_count_plot
+    return cluster_stats
 
 
-def find_mean_var_nd_sort(cluster_values):
+def find_mean_var_nd_sort(cluster_stats):
     """ 
-    calculates mean and variance and finds the avg of all clusters
+    finds the mean of each cluster and the avg of all clusters
     and then sorts the clusters based on the mean value
     returns: indexes, high_low_pixels_based_on_avg_clusters
-    indexes: sorted cluster labels
+    indexes: cluster rows (of cluster_stats) sorted by mean
     high_low_pixels_based_on_avg_clusters: 1 for low, 2 for high
     threshold : threshold calculated after clustering and calculating the mean
     """
-    mean_nd_variance_values = [0 for _ in cluster_values]
 
-    for i in cluster_values:
-        # print(i)   #this for avg_bel, labels
-        x = [np.mean(i) for i in cluster_values[i]]
-        y = [np.std(i) for i in cluster_values[i]]
-        mn = np.mean(x)
-        std = np.std(y)
-        mean_nd_variance_values[i] = [mn,std]
+    cluster_means = cluster_stats['mean'].mean(axis=1)    # every pixel has all years, so this is the mean of the pixel means
 
-    mean_arrmean = round(np.mean([i[0] for i in mean_nd_variance_values]), 3)
+    mean_arrmean = round(float(np.mean(cluster_means)), 3)
     print(f"avg of all clusters -> {mean_arrmean}")  #AVG OF ALL GROUPS
     threshold = mean_arrmean          #cluster threshold
 
-    high_low_pixels_based_on_avg_clusters = []
-
-    for i in mean_nd_variance_values:
-        high_low_pixels_based_on_avg_clusters.append(1 if i[0] < mean_arrmean else 2)  #nominal data - categories...
+    high_low_pixels_based_on_avg_clusters = np.where(cluster_means < mean_arrmean, 1, 2)  #nominal data - categories...
 
-    mean_nd_variance_values = np.array(mean_nd_variance_values)
-    indexes = np.lexsort((mean_nd_variance_values[:,0],))
+    indexes = np.argsort(cluster_means, kind='stable')
 
     return indexes, high_low_pixels_based_on_avg_clusters, threshold
 
 
-def Stats_cluster_label_year_map(cluster_vals, num_clust, threshold, stat_analyz : str = 'mean'):
+def Stats_cluster_label_year_map(cluster_stats, threshold, stat_analyz : str = 'mean'):
     """ 
-     finds mean for each cluster and counts for how many years 
-     the mean was low when cmpared with the threshold value given by find_mean_var_nd_sort func
+     counts for how many years the stat of each cluster was low when cmpared 
+     with the threshold value given by find_mean_var_nd_sort func
      (clustering included)... (used in intermediate maps)
         returns: stat_clust, intermediate_cluster_vals1, intermediate_cluster_vals2, ig_variance
-        stat_clust: {cluster_label: {year: [mean, std, median]}}
-        intermediate_cluster_vals1: {cluster_label: number of years low}
-        intermediate_cluster_vals2: {cluster_label: {year: 'low'/'high'}}
-        ig_variance: {cluster_label: variance}
+        stat_clust: cluster_stats (mean, std, median of shape (n_clusters, n_years))
+        intermediate_cluster_vals1: (n_clusters,) number of years high + 1
+        intermediate_cluster_vals2: (n_clusters, n_years) 'low'/'high'
+        ig_variance: {}
     """
 
-    selected_stat_analyz = stat_analyz_type[stat_analyz]
-
-    stat_clust = {i : {'2019' : 0, '2020' : 0, '2021' : 0, '2022' : 0, '2023' : 0} for i in range(num_clust)}
-    intermediate_cluster_vals1 = {}
-    intermediate_cluster_vals2 = {i : {'2019' : 0, '2020' : 0, '2021' : 0, '2022' : 0, '2023' : 0} for i in range(num_clust)}
-
-    variance_vals = {}
-
-    for i in cluster_vals:
-        stat_clust[i]['2019'] = [np.mean(cluster_vals[i]['2019']), np.std(cluster_vals[i]['2019']), np.median(cluster_vals[i]['2019'])]
-        stat_clust[i]['2020'] = [np.mean(cluster_vals[i]['2020']), np.std(cluster_vals[i]['2020']), np.median(cluster_vals[i]['2020'])]
-        stat_clust[i]['2021'] = [np.mean(cluster_vals[i]['2021']), np.std(cluster_vals[i]['2021']), np.median(cluster_vals[i]['2021'])]
-        stat_clust[i]['2022'] = [np.mean(cluster_vals[i]['2022']), np.std(cluster_vals[i]['2022']), np.median(cluster_vals[i]['2022'])]
-        stat_clust[i]['2023'] = [np.mean(cluster_vals[i]['2023']), np.std(cluster_vals[i]['2023']), np.median(cluster_vals[i]['2023'])]
-
-        counter = 5   #5 years
+    selected = cluster_stats[STAT_FIELDS[stat_analyz_type[stat_analyz]]]
 
-        for j in stat_clust[i]:
-            #clustering intermediate maps
-            if stat_clust[i][j][selected_stat_analyz] < threshold: 
-                counter -= 1  #if all years low, then 0
+    low = selected < threshold
+    n_years = selected.shape[1]
 
-                intermediate_cluster_vals2[i][j] = 'low'
-            else: 
-                intermediate_cluster_vals2[i][j] = 'high'
+    intermediate_cluster_vals1 = n_years - low.sum(axis=1) + 1    #if all years low, then 1
+    intermediate_cluster_vals2 = np.where(low, 'low', 'high')
 
-        intermediate_cluster_vals1[i] = counter + 1     
+    variance_vals = {}
 
-    return stat_clust, intermediate_cluster_vals1, intermediate_cluster_vals2, variance_vals
+    return cluster_stats, intermediate_cluster_vals1, intermediate_cluster_vals2, variance_vals
 
 
-def map_new_labels_with_old(cluster_lineplot, indexes, interested_cluster, threshold, stat_analyz : str):
+def map_new_labels_with_old(cluster_stats, indexes, interested_cluster, threshold, stat_analyz : str):
     """ 
     maps old labels with the new ones after sorting the clsuters based on mean, 
     prints interested cluster values and calls Stat_clust_label function
     returns: op1, op2, op3, op4, mapper
-    op1: cluster_lineplot
-    op2: cluster_values
-    op3: pixel_count_plot
-    op4: high_low_pixels_based_on_avg_clusters
+    op1: stat_clust
+    op2: intermediate_cluster_vals1
+    op3: intermediate_cluster_vals2
+    op4: variance_vals
     mapper: {old_label: new_label}
 
     """
 
-    mapper = {i : j for i, j in zip(indexes, range(len(indexes)))}
-    sorted_cluster_lineplot = {mapper[i] : cluster_lineplot[i] for i in cluster_lineplot}
+    mapper = {int(cluster_stats['clusters'][i]) : j for j, i in enumerate(indexes)}
+    sorted_cluster_stats = {
+        **cluster_stats,
+        **{field : cluster_stats[field][indexes] for field in ('clusters', 'counts') + STAT_FIELDS},
+        'inverse': np.argsort(indexes)[cluster_stats['inverse']],
+    }
 
     if interested_cluster: 
-        print(f"interested cluster {interested_cluster} -> {sorted_cluster_lineplot[interested_cluster]}")
-    stat_clust, intermediate_cluster_vals1, intermediate_cluster_vals2, variance_vals = Stats_cluster_label_year_map(cluster_vals=sorted_cluster_lineplot, num_clust=np.max(indexes) + 1, threshold=threshold, stat_analyz=stat_analyz)
+        print(f"interested cluster {interested_cluster} -> { {field : sorted_cluster_stats[field][interested_cluster] for field in STAT_FIELDS} }")
+    stat_clust, intermediate_cluster_vals1, intermediate_cluster_vals2, variance_vals = Stats_cluster_label_year_map(cluster_stats=sorted_cluster_stats, threshold=threshold, stat_analyz=stat_analyz)
 
     return stat_clust, intermediate_cluster_vals1, intermediate_cluster_vals2, variance_vals, mapper
 
-def make_the_map(x, mapper):
-    x = x.flatten()
-    c = 0
-    for j in range(len(x)):
-        if x[j]:
-            x[j] = mapper[c]
-            c += 1
-        else:
-            x[j] = np.nan
+def valid_pixel_index(shape_to_reshape, nan_posn):
+    """ flat raster positions of the clustered pixels (all but nan_posn), in pixel matrix order """
+    mask = np.ones(shape_to_reshape, dtype=bool)
+    mask[nan_posn] = False
+    return np.flatnonzero(mask)
+
+
+def reconstruct_map(values, shape_to_reshape, nan_posn):
+    """ scatters one value per clustered pixel back onto the raster, nan at nan_posn """
+    x = np.full(shape_to_reshape, np.nan)
+    x.ravel()[valid_pixel_index(shape_to_reshape, nan_posn)] = values
     return x
 
+
+def relabel(labels, mapper):
+    """ applies an {old_label: new_label} mapper to every pixel through a lookup table """
+    old = np.fromiter(mapper.keys(), dtype=np.intp, count=len(mapper))
+    lookup = np.zeros(old.max() + 1, dtype=np.intp)
+    lookup[old] = np.fromiter(mapper.values(), dtype=np.intp, count=len(mapper))
+    return lookup[np.asarray(labels)]
+
+
+def class_counts(classes, num_classes, outlier_classes=()):
+    """ pixel count of each class 1..num_classes, outlier pixels included (nan outliers have no class) """
+    outlier_classes = np.asarray(outlier_classes, dtype=np.float64)
+    outlier_classes = outlier_classes[~np.isnan(outlier_classes)].astype(np.intp)
+
+    counts = np.bincount(np.asarray(classes, dtype=np.intp), minlength=num_classes + 1)[1:num_classes + 1]
+    return counts + np.bincount(outlier_classes, minlength=num_classes + 1)[1:num_classes + 1]
+
+
+def area_table(counts):
+    """ prints and returns the area table rows for class_counts: 900 m² per pixel, acres """
+    table = []
+    for label, num_pixels in enumerate(counts.tolist(), start=1):  #Area, acre counter
+        acres = round(num_pixels * PIXEL_AREA / SQ_METERS_PER_ACRE, 3)
+        print(f"{label} - num of pixels {num_pixels}, Area - {num_pixels * PIXEL_AREA}, Acres - {acres}")
+        table.append({
+            "Label": label, 
+            "Num of Pixels": num_pixels, 
+            "Area": num_pixels * PIXEL_AREA, 
+            "Acres": acres
+        })
+    return table
+
 def save_Table_images(pics_path, name, table):
 
     df = pd.DataFrame(table)
@@ -583,6 +747,16 @@ def save_Table_images(pics_path, name, table):
     plt.close()
     return
 
+def save_table(pics_path, name, table, render_figures : bool = True):
+    """ writes an area table as {name}_table.csv and .json, and as a png when render_figures """
+
+    df = pd.DataFrame(table)
+    df.to_csv(f"{pics_path}/{name}_table.csv", index=False)
+    df.to_json(f"{pics_path}/{name}_table.json", orient='records', indent=2)
+
+    if render_figures:
+        save_Table_images(pics_path=pics_path, name=name, table=table)
+
 def assign_classes_to_outliers(outliers, threshold, include_outlier_pixels : bool = False):
     """
     Assigns classes to outliers based on the threshold calculated
@@ -592,230 +766,170 @@ def assign_classes_to_outliers(outliers, threshold, include_outlier_pixels : boo
     if not include_outlier_pixels:
         return [], []
     
-    # count years for each location where the pixel value is less than the threshold
-    def count_years(data, threshold):
-        count = 5
-        for i in data:
-            if i < threshold:
-                count -= 1
-        return count
-    
     print('🌟🌟🌟 inside outlier function')
     
     
-    outliers = np.array(outliers)
-    min_val = np.min(outliers)
+    outliers = np.array(outliers)    # (n_years, n_outliers)
 
-    outliers_vals_for_6class = []
-    outliers_vals_for_2class = []
+    # bg pixels (min value in any year) get no class
+    is_bg = (outliers == np.min(outliers)).any(axis=0)
 
-    for idx in range(outliers.shape[1]):
-        if min_val in outliers[:, idx]:
-            outliers_vals_for_2class.append(np.nan)
-            outliers_vals_for_6class.append(np.nan)
-            continue
-        outliers_vals_for_2class.append(1 if np.mean(outliers[:, idx]) < threshold else 2)
-        outliers_vals_for_6class.append(count_years(outliers[:, idx], threshold) + 1)
+    outliers_vals_for_2class = np.where(outliers.mean(axis=0) < threshold, 1.0, 2.0)
+    # count years for each location where the pixel value is not less than the threshold
+    outliers_vals_for_6class = (outliers.shape[0] - (outliers < threshold).sum(axis=0) + 1).astype(np.float64)
+
+    outliers_vals_for_2class[is_bg] = np.nan
+    outliers_vals_for_6class[is_bg] = np.nan
         
     return outliers_vals_for_6class, outliers_vals_for_2class
 
-def high_low_using_clustering(high_low_pixel_vals, labels, shape_to_reshape, nan_posn, pics_path, vals_in_None, include_outlier_pixels : bool = False):
+def high_low_using_clustering(high_low_pixel_vals, labels, shape_to_reshape, nan_posn, pics_path, vals_in_None, include_outlier_pixels : bool = False, render_figures : bool = True):
     """ 
     this one gives high low  based on clusters, plots the intervals 
     (how many high and low for how many years based on average, no clust) 
     along with acres calculation
     """
 
-    mapper = {i : high_low_pixel_vals[i] for i in range(len(high_low_pixel_vals))}    # 'i' was taken in order of labels in cluster variable in find_mean_var_nd_sort()
-    new_lb = [mapper[i] for i in labels]
+    new_lb = np.asarray(high_low_pixel_vals)[labels]    # high_low_pixel_vals is in order of labels, from find_mean_var_nd_sort()
 
-    x = np.ones(shape = shape_to_reshape)
+    count_high_low_pixels = class_counts(new_lb, 2, vals_in_None)  #counting high low pixels + outlier pixels too
 
-    count_high_low_pixels = {i : new_lb.count(i) + vals_in_None.count(i) for i in [1, 2]}  #counting high low pixels + outlier pixels too
-
-    table = []
-    for i in [1, 2]:   #Area, acre counter for high low
-        print(f"{i} - Pixel Count - {count_high_low_pixels[i]}, Area - {count_high_low_pixels[i]*900}, Acres - {round(count_high_low_pixels[i]*900/4046.86, 3)}")
-        table.append({
-            "Label": i, 
-            "Num of Pixels": count_high_low_pixels[i], 
-            "Area": count_high_low_pixels[i] * 900, 
-            "Acres": round(count_high_low_pixels[i] * 900 / 4046.86, 3)
-        })
-    
-    save_Table_images(pics_path=pics_path, table=table, name='high_low_clustering')
+    table = area_table(count_high_low_pixels)
     
-    x[nan_posn] = 0
+    save_table(pics_path=pics_path, table=table, name='high_low_clustering', render_figures=render_figures)
 
-    x = make_the_map(x=x, mapper=new_lb)
+    x = reconstruct_map(new_lb, shape_to_reshape, nan_posn)
     
     print('w clust')
-    x = np.reshape(x, shape_to_reshape)
 
     # outlier pixels are included too
     if include_outlier_pixels:
         x[nan_posn] = vals_in_None
 
-    plt.figure(figsize = (10, 10))
-    plt.axis('off')
-    plt.imshow(x,cmap = cool_map2)
-    # cbar  =  plt.colorbar()
-    # cbar.set_ticks(np.arange(1, 3, dtype = int))
-    # cbar.set_ticklabels(np.arange(1, 3, dtype = int))
-    plt.grid(False)
+    if render_figures:
+        plt.figure(figsize = (10, 10))
+        plt.axis('off')
+        plt.imshow(x,cmap = cool_map2)
+        # cbar  =  plt.colorbar()
+        # cbar.set_ticks(np.arange(1, 3, dtype = int))
+        # cbar.set_ticklabels(np.arange(1, 3, dtype = int))
+        plt.grid(False)
+        # plt.show()
+        plt.close()
 
-    # Save the plot as a .tif image locally
+    # Save the map as a .tif image locally
     output_path = f'{pics_path}/high_low_clustering.tif'  # Specify the output file name
     # plt.savefig(output_path, format='tiff', bbox_inches='tight', pad_inches=0)
     tifffile.imwrite(output_path, x.astype('float32'))  
-    # plt.show()
-    plt.close()
 
 
-def high_low_and_intermediate_without_clustering(data, shape_to_reshape, nan_posn, confusion_matrix_store, pics_path, vals_in_None, include_outlier_pixels: bool = False):
+def high_low_and_intermediate_without_clustering(data, shape_to_reshape, nan_posn, confusion_matrix_store, pics_path, vals_in_None, include_outlier_pixels: bool = False, render_figures : bool = True):
     """ 
     high low map, intermediate map map  (without clustering version) 
     """
-    x = np.ones(shape = shape_to_reshape)
-    x[nan_posn] = 0
-
-    x = x.flatten()
-    indxr = 0
-
-    temp = data
-    avg_of_each_pix_4_5yrs = []
-    for i in range(data.shape[0]):
-        avg_of_each_pix_4_5yrs.append(np.mean(temp[i]))
+    avg_of_each_pix_4_5yrs = data.mean(axis=1)
     
     total_mean = round(np.mean(avg_of_each_pix_4_5yrs), 3)
     print(f"high_low_without_clustering threshold-> {total_mean}")
 
     outlier_vals_for_6class_clust, outlier_vals_for_2class_clust = assign_classes_to_outliers(outliers=vals_in_None, threshold=total_mean, include_outlier_pixels=include_outlier_pixels)
 
-    acre_counter = {i : outlier_vals_for_2class_clust.count(i) for i in [1, 2]}  # including the outlier pixels too
-
-    print(set(outlier_vals_for_2class_clust))
+    high_low = np.where(avg_of_each_pix_4_5yrs < total_mean, 1, 2)
 
-    for j in range(len(x)):
-        if x[j]:
-            x[j] = 1 if avg_of_each_pix_4_5yrs[indxr] < total_mean else 2
-            acre_counter[x[j]] += 1
-            indxr += 1
-        else:
-            x[j] = np.nan
-        
+    acre_counter = class_counts(high_low, 2, outlier_vals_for_2class_clust)  # including the outlier pixels too
 
+    print(f"sum of pixels - {acre_counter.sum()}")
 
-    print(f"sum of pixels - {sum(acre_counter.values())}")
+    table = area_table(acre_counter)
 
-    table = []
-    for label in [1, 2]:
-        print(f"{label} - num of pixels {acre_counter[label]}, Area - {acre_counter[label] * 900}, Acres - {round(acre_counter[label] * 900 / 4046.86, 3)}")
-        table.append({
-            "Label": label, 
-            "Num of Pixels": acre_counter[label], 
-            "Area": acre_counter[label] * 900, 
-            "Acres": round(acre_counter[label] * 900 / 4046.86, 3)
-        })
 
+    save_table(pics_path=pics_path, table=table, name='high_low_rulebased', render_figures=render_figures)
 
-    save_Table_images(pics_path=pics_path, table=table, name='high_low_rulebased')
+    x = reconstruct_map(high_low, shape_to_reshape, nan_posn)
 
     print('wo clust')
-    x = np.reshape(x, shape_to_reshape)
 
     if include_outlier_pixels:
         print(len(outlier_vals_for_2class_clust))
         x[nan_posn] = outlier_vals_for_2class_clust
 
-    plt.figure(figsize = (10, 10))
-    plt.axis('off')
-    # plt.title('wo clustering')
-    plt.imshow(x,cmap = cool_map2)
-    # cbar  =  plt.colorbar()
-    # cbar.set_ticks(np.arange(1, 3, dtype = int))
-    # cbar.set_ticklabels(np.arange(1, 3, dtype = int))
-    plt.grid(False)
-    # plt.show()
+    if render_figures:
+        plt.figure(figsize = (10, 10))
+        plt.axis('off')
+        # plt.title('wo clustering')
+        plt.imshow(x,cmap = cool_map2)
+        # cbar  =  plt.colorbar()
+        # cbar.set_ticks(np.arange(1, 3, dtype = int))
+        # cbar.set_ticklabels(np.arange(1, 3, dtype = int))
+        plt.grid(False)
+        # plt.show()
+        plt.close()
 
     output_path = f'{pics_path}/high_low_rulebased.tif'  # Specify the output file name
     # plt.savefig(output_path, format='tiff', bbox_inches='tight', pad_inches=0)
     tifffile.imwrite(output_path, x.astype('float32'))  
-    plt.close()
 
 
     #❌❌❌ Intermediate map generated based on avg of all 5 years...
 
-    new_val = []
     print(f"threshold-> {total_mean}")
 
     #❌❌❌ Rule based for each pixel, finding intermed vals, (threshld val shud be the avg of all 5 years {not clust thresh})
-    for i in range(data.shape[0]):
-        bl = 0            #5-bl  =  ab
-        for j in data[i]:
-            if j < total_mean : bl += 1
-        new_val.append(5 - bl + 1)
-
-    count_val = {i : new_val.count(i) + outlier_vals_for_6class_clust.count(i) for i in [1, 2, 3, 4, 5, 6]}   # adding pixels and outlier pixels too
-    print(sum(count_val.values()))
-
-    table = []
-    for i in [1, 2, 3, 4, 5, 6]:
-        print(f"{i}-Pixel count - {count_val[i]}, Area - {count_val[i]*900}, Acres - {round(count_val[i]*900/4046.86, 3)}")
-        table.append({
-            "Label": i, 
-            "Num of Pixels": count_val[i], 
-            "Area": count_val[i] * 900, 
-            "Acres": round(count_val[i] * 900 / 4046.86, 3)
-        })
+    n_years = data.shape[1]
+    new_val = n_years - (data < total_mean).sum(axis=1) + 1      #years not below the threshold + 1
 
-    save_Table_images(pics_path=pics_path, table=table, name='intermediate_rule_based')
+    count_val = class_counts(new_val, n_years + 1, outlier_vals_for_6class_clust)   # adding pixels and outlier pixels too
+    print(count_val.sum())
 
-    x = np.ones(shape = shape_to_reshape)
-    x[nan_posn] = 0
+    table = area_table(count_val)
 
-    x = make_the_map(x=x, mapper=new_val)
+    save_table(pics_path=pics_path, table=table, name='intermediate_rule_based', render_figures=render_figures)
 
-    confusion_matrix_store.append((x, 'woclust'))
+    x = reconstruct_map(new_val, shape_to_reshape, nan_posn)
     
     print('wo clust')
-    # print(set(new_val))
-    x = np.reshape(x, shape_to_reshape)
 
     if include_outlier_pixels:
         x[nan_posn] = outlier_vals_for_6class_clust  # including outlier pixels to the map
 
+    confusion_matrix_store.append((x, 'woclust'))
+
+
+    if render_figures:
+        plt.figure(figsize = (10, 10))
+        plt.axis('off')
+        # plt.title('Intermediate map (wo clust)')
+        plt.imshow(x,cmap = cool_map3)
+        plt.grid(False)
+        # plt.colorbar(label = 'Color Legend')
+        # plt.show()
+        plt.close()
 
-    plt.figure(figsize = (10, 10))
-    plt.axis('off')
-    # plt.title('Intermediate map (wo clust)')
-    plt.imshow(x,cmap = cool_map3)
-    plt.grid(False)
-    # plt.colorbar(label = 'Color Legend')
-    # plt.show()
     output_path = f'{pics_path}/intermediate_rule_based.tif'  # Specify the output file name
     # plt.savefig(output_path, format='tiff', bbox_inches='tight', pad_inches=0)
     tifffile.imwrite(output_path, x.astype('float32'))  
-    plt.close()
 
     return confusion_matrix_store
 
 
-def LinePLot_X_Intermediate_map(stat_clust_vals, inter_clust_val1, threshold, variance_plot, mapper_4_plotting, confusion_matrix_store, labels, shape_to_reshape,  stat_analyz, nan_posn, vals_in_None, pics_path, include_outlier_pixels : bool = False): 
-    """ plots lineplot by taking each mean value of a cluster for each year and then plots the intermediate map (clustered version)"""
+def line_plot(stat_clust_vals, threshold, stat_analyz, pics_path, render_figures : bool = True):
+    """ plots lineplot by taking each mean value of a cluster for each year, returns the plotted data (line_plot.csv when not rendering) """
 
     selected_stat_analyz = stat_analyz_type[stat_analyz]
 
     # 🌟🌟🌟 Line plot
-    labels_plots = ['2019', '2020', '2021', '2022', '2023']
-    data = []
+    selected = stat_clust_vals[STAT_FIELDS[selected_stat_analyz]]
+    num_clust, n_years = selected.shape
 
-    for i in labels_plots:
-        y_val = [stat_clust_vals[lab][i][selected_stat_analyz] for lab in stat_clust_vals]
-        for lab, val in zip(stat_clust_vals.keys(), y_val):
-            data.append({'Cluster': lab, 'Value': val, 'Year': i})
+    data = pd.DataFrame({
+        'Cluster': np.tile(np.arange(num_clust), n_years),
+        'Value': selected.T.ravel(),
+        'Year': np.repeat(stat_clust_vals['years'], num_clust),
+    })
 
-    data = pd.DataFrame(data)
+    if not render_figures:
+        data.to_csv(f'{pics_path}/line_plot.csv', index=False)
+        return data
     
     plt.figure(figsize=(35, 10))
 
@@ -844,7 +958,11 @@ def LinePLot_X_Intermediate_map(stat_clust_vals, inter_clust_val1, threshold, va
 
     plt.close()
 
+    return data
+
 
+def intermediate_clustering_map(inter_clust_val1, threshold, mapper_4_plotting, confusion_matrix_store, labels, shape_to_reshape, nan_posn, vals_in_None, pics_path, num_classes : int = 6, include_outlier_pixels : bool = False, render_figures : bool = True):
+    """ intermediate map (clustered version): number of high years of each pixel's cluster + 1, num_classes is n_years + 1 """
 
     # INTERMEDIATE MAPS 👇  (Avg value from clustering , wo clust is done in high_low_using_clustering())
 
@@ -852,78 +970,68 @@ def LinePLot_X_Intermediate_map(stat_clust_vals, inter_clust_val1, threshold, va
 
     #❌❌❌ converting old labels to new and then getting that label's intermed value... 
 
-    new_labels = [inter_clust_val1[mapper_4_plotting[i]] for i in labels]    # takes the intermed values of new labels
-
-    # temp = 0
-    # for i in labels:   #ig for clusters affter 60
-    #     if mapper_4_plotting[i] >= 60:
-    #         temp += 1
-    # print(temp)
+    new_labels = inter_clust_val1[relabel(labels, mapper_4_plotting)]    # takes the intermed values of new labels
 
-
-    new_labels_count = {i : new_labels.count(i) + vals_in_None.count(i) for i in [1, 2, 3, 4, 5, 6]}   # included outliers too
-
-
-    for i in range(1, 7):
-        if i not in new_labels_count:
-            new_labels_count[i] = 0
+    new_labels_count = class_counts(new_labels, num_classes, vals_in_None)   # included outliers too
 
     # Complete pixel count
-    print(f"pixel count -> {sum(new_labels_count.values())} ")
+    print(f"pixel count -> {new_labels_count.sum()} ")
 
-    table = []
-    for i in [1, 2, 3, 4, 5, 6]:  #Area, Acre Counter
-        print(f"{i}- num of pixels {new_labels_count[i]}, Area - {new_labels_count[i]*900}, Acres - {round(new_labels_count[i]*900/4046.86, 3)}")
-        table.append({
-            "Label": i, 
-            "Num of Pixels": new_labels_count[i], 
-            "Area": new_labels_count[i] * 900, 
-            "Acres": round(new_labels_count[i] * 900 / 4046.86, 3)
-        })
+    table = area_table(new_labels_count)
     
 
-    save_Table_images(pics_path=pics_path, name='intermediate_clustering', table=table)
+    save_table(pics_path=pics_path, name='intermediate_clustering', table=table, render_figures=render_figures)
 
-    x = np.ones(shape = shape_to_reshape)
-    x[nan_posn] = 0
-
-
-    x = make_the_map(x=x, mapper=new_labels)
-
-    # x = x.flatten()
-    # c = 0
-    # for j in range(len(x)):
-    #     if x[j]:
-    #         x[j] = new_labels[c]
-    #         c += 1
-    #     else:
-    #         x[j] = np.nan
-        
-
-    confusion_matrix_store.append((x, 'wclust')) 
+    x = reconstruct_map(new_labels, shape_to_reshape, nan_posn)
 
     print('w clust')
-    x = np.reshape(x, shape_to_reshape)
     
     if include_outlier_pixels:
         x[nan_posn] = vals_in_None
 
+    confusion_matrix_store.append((x, 'wclust')) 
 
-    plt.figure(figsize = (10, 10))
-    # plt.title('Intermediate map (w clust)')
-    plt.axis('off')
-    
-    bounds = [1, 2, 3, 4, 5, 6, 7]  # 6 labels + 1 for upper boundary
-    norm = BoundaryNorm(bounds, len(coolors3), extend='neither')
 
-    plt.imshow(x,cmap = cool_map3, norm=norm)
-    plt.grid(False)
-    # plt.colorbar(label = 'Color Legend')
-    # plt.show()
+    if render_figures:
+        plt.figure(figsize = (10, 10))
+        # plt.title('Intermediate map (w clust)')
+        plt.axis('off')
+        
+        bounds = list(range(1, num_classes + 2))  # 6 labels + 1 for upper boundary
+        norm = BoundaryNorm(bounds, len(coolors3), extend='neither')
+
+        plt.imshow(x,cmap = cool_map3, norm=norm)
+        plt.grid(False)
+        # plt.colorbar(label = 'Color Legend')
+        # plt.show()
+        plt.close()
+
     output_path = f'{pics_path}/intermediate_clustering.tif'  # Specify the output file name
     # plt.savefig(output_path, format='tiff', bbox_inches='tight', pad_inches=0)
     tifffile.imwrite(output_path, x.astype('float32'))
-    plt.close()
+
+    return confusion_matrix_store
+
+
+def LinePLot_X_Intermediate_map(stat_clust_vals, inter_clust_val1, threshold, variance_plot, mapper_4_plotting, confusion_matrix_store, labels, shape_to_reshape,  stat_analyz, nan_posn, vals_in_None, pics_path, include_outlier_pixels : bool = False, render_figures : bool = True): 
+    """ plots lineplot by taking each mean value of a cluster for each year and then plots the intermediate map (clustered version)"""
+
+    data = line_plot(stat_clust_vals=stat_clust_vals, threshold=threshold, stat_analyz=stat_analyz, pics_path=pics_path, render_figures=render_figures)
+
+    confusion_matrix_store = intermediate_clustering_map(
+                                inter_clust_val1=inter_clust_val1, 
+                                threshold=threshold, 
+                                mapper_4_plotting=mapper_4_plotting, 
+                                confusion_matrix_store=confusion_matrix_store, 
+                                labels=labels, 
+                                shape_to_reshape=shape_to_reshape, 
+                                nan_posn=nan_posn, 
+                                vals_in_None=vals_in_None, 
+                                pics_path=pics_path, 
+                                num_classes=stat_clust_vals['mean'].shape[1] + 1, 
+                                include_outlier_pixels=include_outlier_pixels, 
+                                render_figures=render_figures
+                            )
 
     return confusion_matrix_store, data
 
@@ -931,50 +1039,43 @@ def LinePLot_X_Intermediate_map(stat_clust_vals, inter_clust_val1, threshold, va
 
 
 
-def interested_cluster_plot(mapper, labels, shape_to_reshape, nan_posn, interested_cluster, pics_path, title='interested_cluster_map'):
+def interested_cluster_plot(mapper, labels, shape_to_reshape, nan_posn, interested_cluster, pics_path, title='interested_cluster_map', render_figures : bool = True):
     """ 
      plots the pixel map, with the interested cluster value
     """
-    temp = np.ones(shape=shape_to_reshape)
-    temp[nan_posn] = 0
-    temp = temp.flatten()
-    c = 0
-    pix_counter = 0
-
-    for i in range(len(temp)):
-        if temp[i]:
-            if mapper[labels[c]] == interested_cluster:
-                pix_counter += 1
-                temp[i] = 2
-            else:temp[i] = 1
-            c += 1
-        else:
-            temp[i] = np.nan
-
-    print(f"{interested_cluster} - num of pixels {pix_counter}, Area - {pix_counter * 900}, Acres - {round(pix_counter * 900 / 4046.86, 3)}")
-
-    temp=np.reshape(temp, shape_to_reshape)
-    plt.figure(figsize=(5,5))
-    plt.imshow(temp,cmap=cool_map2)
-
-    cbar = plt.colorbar()
-    cbar.set_ticks(np.arange(1, 3, dtype=int))
-    cbar.set_ticklabels(np.arange(1, 3, dtype=int))
-    plt.title(f'2 -> Cluster {interested_cluster}')
-    plt.grid(False)
+    in_cluster = np.isin(relabel(labels, mapper), interested_cluster)
+    pix_counter = np.count_nonzero(in_cluster)
+
+    print(f"{interested_cluster} - num of pixels {pix_counter}, Area - {pix_counter * PIXEL_AREA}, Acres - {round(pix_counter * PIXEL_AREA / SQ_METERS_PER_ACRE, 3)}")
+
+    temp = reconstruct_map(np.where(in_cluster, 2, 1), shape_to_reshape, nan_posn)
+
+    if render_figures:
+        plt.figure(figsize=(5,5))
+        plt.imshow(temp,cmap=cool_map2)
+
+        cbar = plt.colorbar()
+        cbar.set_ticks(np.arange(1, 3, dtype=int))
+        cbar.set_ticklabels(np.arange(1, 3, dtype=int))
+        plt.title(f'2 -> Cluster {interested_cluster}')
+        plt.grid(False)
+        plt.close()
 
     output_path = f'{pics_path}/interested_pixel_{title}.tif'  # Specify the output file name
     # plt.savefig(output_path, format='tiff', bbox_inches='tight', pad_inches=0)
     tifffile.imwrite(output_path, temp.astype('float32'))  
-    plt.close()
 
 
 
-def pix_count(pixel_count_plot, mapper, pics_path):
-        rev_mapper = {j : i for i, j in mapper.items()}
-        x = {i:pixel_count_plot[rev_mapper[i]] for i in pixel_count_plot.keys()}
+def pix_count(cluster_stats, mapper, pics_path, render_figures : bool = True):
+        new_labels = [mapper[int(i)] for i in cluster_stats['clusters']]
+        x = dict(sorted(zip(new_labels, cluster_stats['counts'].tolist())))
 
         print(f"Pixel Count -> {x}")
+
+        if not render_figures:
+            pd.DataFrame({'Cluster': list(x.keys()), 'Num of Pixels': list(x.values())}).to_csv(f'{pics_path}/pixel_count.csv', index=False)
+            return
         
         plt.figure(figsize = (35,10))
         plt.plot(x.keys(), x.values(), label='pixel')
@@ -996,12 +1097,13 @@ def pix_count(pixel_count_plot, mapper, pics_path):
         plt.close()
 
 
-def confusion_matrix(confusion_matrix_store):
-    ConfusionMatrix = [{j : 0 for j in range(6)} for _ in range(6)]
-    for i in range(len(confusion_matrix_store[0][0])):
-        if np.isnan(confusion_matrix_store[0][0][i]):
-            continue
-        rb = int(confusion_matrix_store[0][0][i])   #rule based -> rows (actual)
-        clt = int(confusion_matrix_store[1][0][i])  #clustering -> cols (pred)
-        ConfusionMatrix[rb - 1][clt - 1] += 1
-    return np.transpose([[j[i] for i in j] for j in ConfusionMatrix])   #rule based (actual) - cols, clust (pred) - rows
\ No newline at end of file
+def confusion_matrix(confusion_matrix_store, num_classes : int = 6):
+    rule_based = confusion_matrix_store[0][0].ravel()   #rule based -> rows (actual)
+    clustered = confusion_matrix_store[1][0].ravel()    #clustering -> cols (pred)
+
+    valid = ~np.isnan(rule_based)
+    rb = rule_based[valid].astype(np.intp) - 1
+    clt = clustered[valid].astype(np.intp) - 1
+
+    ConfusionMatrix = np.bincount(rb * num_classes + clt, minlength=num_classes * num_classes).reshape(num_classes, num_classes)
+    return ConfusionMatrix.T   #rule based (actual) - cols, clust (pred) - rows
\ No newline at end of file
@@ -4,3 +4,10 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+const BACKEND_API_URL = import.meta.env.VITE_BACKEND_URL || "http://localhost:8000";
+
+// Maps are served by the backend at a relative path; older analyses still hold inline data URLs
+export function resolveMapUrl(url: string) {
+  return url.startsWith("/") ? `${BACKEND_API_URL}${url}` : url
+}
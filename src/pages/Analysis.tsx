@@ -19,6 +19,7 @@ import { supabase } from "@/integrations/supabase/client";
 import { toast } from "sonner";
 import axios from "axios";
 import FieldMap from "@/components/FieldMap";
+import { resolveMapUrl } from "@/lib/utils";
 
 const BACKEND_API_URL = import.meta.env.VITE_BACKEND_URL || "http://localhost:8000";
 
@@ -367,7 +368,7 @@ const Analysis = () => {
                       <div className="space-y-4">
                         <div className="flex justify-center">
                           <img
-                            src={analysisResult.classification_map_url}
+                            src={resolveMapUrl(analysisResult.classification_map_url)}
                             alt="Classification Map"
                             className="max-w-2xl w-full rounded-lg shadow-medium"
                             style={{ maxHeight: '500px', objectFit: 'contain' }}
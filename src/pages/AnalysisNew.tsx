@@ -18,9 +18,9 @@ import {
 } from "lucide-react";
 import { supabase } from "@/integrations/supabase/client";
 import { toast } from "sonner";
-import axios from "axios";
 import FieldSelectionDialog from "@/components/FieldSelectionDialog";
 import FieldMap from "@/components/FieldMap";
+import { resolveMapUrl } from "@/lib/utils";
 
 const BACKEND_API_URL = import.meta.env.VITE_BACKEND_URL || "http://localhost:8000";
 
@@ -69,6 +69,7 @@ const AnalysisNew = () => {
   const [showMap, setShowMap] = useState(false);
   const [analysisLoading, setAnalysisLoading] = useState(false);
   const [analysisResult, setAnalysisResult] = useState<AnalysisResult | null>(null);
+  const [analysisProgress, setAnalysisProgress] = useState<string | null>(null);
 
   const handleFieldSelect = (field: Field) => {
     setSelectedField(field);
@@ -102,6 +103,30 @@ const AnalysisNew = () => {
     }
   };
 
+  // Turns a server-sent progress event into a short status line
+  const describeProgress = (event: string, data: any): string | null => {
+    switch (event) {
+      case "ndvi":
+        return "Searching satellite imagery...";
+      case "scene_selected":
+        return `Imagery for ${data.year} selected (${Number(data.cloud_cover).toFixed(1)}% clouds, ±${data.date_difference} days)`;
+      case "clustering":
+        return "Clustering field pixels...";
+      case "clustering_done":
+        return `Found ${data.num_clusters} clusters (threshold ${Number(data.threshold).toFixed(3)})`;
+      case "map_ready":
+        return "Classification map ready";
+      case "recommendations":
+        return "Generating crop recommendations...";
+      case "recommendations_ready":
+        return "Crop recommendations ready";
+      case "persist":
+        return "Saving analysis...";
+      default:
+        return null;
+    }
+  };
+
   const runAnalysis = async () => {
     if (!selectedField) {
       toast.error("Please select a field first");
@@ -118,29 +143,75 @@ const AnalysisNew = () => {
     toast.info("Starting analysis... This may take 2-5 minutes");
 
     try {
-      const response = await axios.post(`${BACKEND_API_URL}/api/analyze-field`, {
-        field_id: selectedField.id,
-        field_name: selectedField.name,
-        coordinates: {
-          type: "Polygon",
-          coordinates: JSON.parse(selectedField.coordinates),
-        },
-        soil_type: selectedField.soil_type,
-        water_source: selectedField.water_source,
-        crop_type: selectedField.crop_type,
-        location: selectedField.location,
-        district: selectedField.district,
-        state: selectedField.state,
+      const response = await fetch(`${BACKEND_API_URL}/api/analyze-field/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          field_id: selectedField.id,
+          field_name: selectedField.name,
+          coordinates: {
+            type: "Polygon",
+            coordinates: JSON.parse(selectedField.coordinates),
+          },
+          soil_type: selectedField.soil_type,
+          water_source: selectedField.water_source,
+          crop_type: selectedField.crop_type,
+          location: selectedField.location,
+          district: selectedField.district,
+          state: selectedField.state,
+        }),
       });
 
-      setAnalysisResult(response.data);
+      if (!response.ok || !response.body) {
+        const body = await response.json().catch(() => null);
+        throw new Error(body?.detail || "Failed to complete analysis");
+      }
+
+      // Read server-sent events until the final result (or error) arrives
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let result: AnalysisResult | null = null;
+
+      while (!result) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const messages = buffer.split("\n\n");
+        buffer = messages.pop() || "";
+
+        for (const message of messages) {
+          let event = "message";
+          let data = "";
+          for (const line of message.split("\n")) {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) data += line.slice(5).trim();
+          }
+          if (!data) continue;
+
+          const payload = JSON.parse(data);
+          if (event === "error") throw new Error(payload.detail);
+          if (event === "result") {
+            result = payload;
+            break;
+          }
+          const status = describeProgress(event, payload);
+          if (status) setAnalysisProgress(status);
+        }
+      }
+
+      if (!result) throw new Error("Analysis stream ended unexpectedly");
+
+      setAnalysisResult(result);
       toast.success("Analysis completed successfully!");
     } catch (error: any) {
       console.error("Analysis error:", error);
-      const errorMsg = error.response?.data?.detail || "Failed to complete analysis";
+      const errorMsg = error.message || "Failed to complete analysis";
       toast.error(errorMsg);
     } finally {
       setAnalysisLoading(false);
+      setAnalysisProgress(null);
     }
   };
 
@@ -260,6 +331,9 @@ const AnalysisNew = () => {
                   {selectedField.coordinates ? "Edit" : "Draw"} Boundaries
                 </Button>
               </div>
+              {analysisLoading && analysisProgress && (
+                <p className="text-sm text-muted-foreground mt-3">{analysisProgress}</p>
+              )}
             </CardContent>
           </Card>
         )}
@@ -303,7 +377,7 @@ const AnalysisNew = () => {
                       <div className="space-y-4">
                         <div className="flex justify-center">
                           <img
-                            src={analysisResult.classification_map_url}
+                            src={resolveMapUrl(analysisResult.classification_map_url)}
                             alt="Classification Map"
                             className="max-w-2xl w-full rounded-lg shadow-medium"
                             style={{ maxHeight: '500px', objectFit: 'contain' }}
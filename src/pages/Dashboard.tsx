@@ -5,6 +5,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/com
 import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
 import { Progress } from "@/components/ui/progress";
+import { resolveMapUrl } from "@/lib/utils";
 
 import {
   Map as MapIcon,
@@ -515,7 +516,7 @@ const Dashboard = () => {
                             <div className="space-y-3">
                               <div className="flex justify-center">
                                 <img
-                                  src={recentAnalysis.classification_map_url}
+                                  src={resolveMapUrl(recentAnalysis.classification_map_url)}
                                   alt="Classification Map"
                                   className="max-w-full rounded-lg shadow-medium"
                                   style={{ maxHeight: '400px', objectFit: 'contain' }}